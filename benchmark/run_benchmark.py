@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.callbacks import BaseCallbackHandler
+
+# The Professor lives in src/, the percentile helper next to the ingest pipeline
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(ROOT, "src"))
+sys.path.append(os.path.join(ROOT, "helper"))
+from embedding_pipeline import percentile
+from stat_index import value_key
+
+# CONFIGURATION
+QUESTIONS_FILE = "./benchmark/questions.jsonl"
+RESULTS_DIR = "./benchmark/results"
+FAKE_DB_DIRECTORY = "./benchmark/fake_db" # Built with create_db.py --fake-embeddings on first use
+REAL_DB_DIRECTORY = "./pokedex_db"
+STAGES = ["query_construction", "vector_search", "retrieval", "tool", "agent_turn", "agent_tool", "end_to_end"]
+
+class StageTimer(BaseCallbackHandler):
+    """Times the agent's own LLM turns (tagged 'agent') and its tool calls during one run."""
+
+    def __init__(self):
+        self.starts = {}
+        self.durations = defaultdict(list)
+        self.output_tokens = 0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, **kwargs):
+        if "agent" in (tags or []):
+            self.starts[run_id] = ("agent_turn", time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self.starts.pop(run_id, None)
+        if started:
+            self.durations[started[0]].append(time.perf_counter() - started[1])
+            for generation in response.generations[0]:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                self.output_tokens += (usage or {}).get("output_tokens", 0)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.starts[run_id] = ("agent_tool", time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        started = self.starts.pop(run_id, None)
+        if started:
+            self.durations[started[0]].append(time.perf_counter() - started[1])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.starts.pop(run_id, None)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.starts.pop(run_id, None)
+
+class SearchTimer:
+    """Wraps vectorstore.similarity_search so retrieval can be split into query construction vs search."""
+
+    def __init__(self, vectorstore):
+        self.local = threading.local()
+        search = vectorstore.similarity_search
+
+        def timed_search(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return search(*args, **kwargs)
+            finally:
+                self.local.seconds = getattr(self.local, "seconds", 0.0) + time.perf_counter() - start
+
+        vectorstore.similarity_search = timed_search
+
+    def take(self):
+        """Search time spent on this thread since the last call."""
+        seconds = getattr(self.local, "seconds", 0.0)
+        self.local.seconds = 0.0
+        return seconds
+
+def load_questions(path, categories=None):
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+    return [q for q in questions if not categories or q['category'] in categories]
+
+def recall_at_k(retrieved, expected, k):
+    """Share of the expected Pokemon found in the top k (out of at most k we could have found)."""
+    if not expected:
+        return None
+    found = {value_key(name) for name in retrieved} & {value_key(name) for name in expected}
+    return len(found) / min(k, len(expected))
+
+def latency_stats(seconds):
+    if not seconds:
+        return None
+    return {
+        "count": len(seconds),
+        "mean_ms": round(sum(seconds) / len(seconds) * 1000, 3),
+        "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 3),
+    }
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return round(sum(values) / len(values), 4) if values else None
+
+def run_retrieval(chat, search_timer, question):
+    """Retriever only: what the search tool would hand the agent, and how long each half took."""
+    start = time.perf_counter()
+    search_timer.take()
+    docs = chat.retriever.invoke(question['question'])
+    total = time.perf_counter() - start
+    search = search_timer.take()
+    names = [doc.metadata.get('name', '') for doc in docs]
+    return {
+        "path": "fast" if chat.retriever.parser.parse(question['question']) else "llm",
+        "retrieval": total,
+        "vector_search": search,
+        "query_construction": total - search,
+        "retrieved": names,
+        "recall": recall_at_k(names, question.get('expected', []), chat.retriever.k),
+    }
+
+def run_tool(tools, question):
+    """Calls the question's dedicated tool directly, independent of what the agent decides to do."""
+    if not question.get('tool'):
+        return {}
+    start = time.perf_counter()
+    output = str(tools[question['tool']].invoke(question['args']))
+    seconds = time.perf_counter() - start
+    return {"tool": seconds, "tool_correct": all(s in output for s in question.get('answer_contains', []))}
+
+def run_agent(agent_executor, question):
+    timer = StageTimer()
+    start = time.perf_counter()
+    try:
+        answer = agent_executor.invoke({"input": question['question']}, config={"callbacks": [timer]})['output']
+        error = None
+    except Exception as e:
+        answer, error = None, str(e)
+    return {
+        "end_to_end": time.perf_counter() - start,
+        "agent_turns": len(timer.durations["agent_turn"]),
+        "agent_turn": timer.durations["agent_turn"],
+        "agent_tool": timer.durations["agent_tool"],
+        "output_tokens": timer.output_tokens,
+        "answer": answer,
+        "error": error,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(current, previous_path):
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\n📊 Compared with {previous_path} ({previous.get('commit')}, {previous.get('mode')} mode):")
+    for stage in STAGES:
+        now, before = current['latency'].get(stage), previous['latency'].get(stage)
+        if now and before and before['p50_ms']:
+            change = (now['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+            print(f"   {stage:<20} p50 {before['p50_ms']:9.2f} -> {now['p50_ms']:9.2f} ms ({change:+.0f}%)")
+    for key in ["throughput_qps", "recall_at_k", "tool_accuracy"]:
+        print(f"   {key:<20} {previous.get(key)} -> {current.get(key)}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Professor's retriever, tools and agent on a fixed question set.")
+    parser.add_argument("--real", action="store_true", help="Use Ollama and ./pokedex_db instead of the fake backends")
+    parser.add_argument("--questions", default=QUESTIONS_FILE, help="JSONL question corpus")
+    parser.add_argument("--category", action="append", help="Only run this category (repeatable)")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to run the whole corpus")
+    parser.add_argument("--concurrency", type=int, default=1, help="Agent runs in parallel (for throughput)")
+    parser.add_argument("--db", default=None, help="Chroma folder (default depends on --real)")
+    parser.add_argument("--output", default=None, help="Results JSON (default: benchmark/results/<mode>-<time>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    mode = "real" if args.real else "fake"
+    db_directory = args.db or (REAL_DB_DIRECTORY if args.real else FAKE_DB_DIRECTORY)
+    questions = load_questions(args.questions, args.category)
+    if not questions:
+        print(f"❌ Error: no questions in {args.questions}.")
+        return
+
+    # 1. Backends (chat.py reads these when it's imported)
+    if not args.real:
+        os.environ["POKEDEX_FAKE_MODELS"] = "1"
+        if not os.path.exists(db_directory):
+            print(f"🧪 Building a fake-embedding vector DB in {db_directory}...")
+            subprocess.run([sys.executable, os.path.join(ROOT, "helper", "create_db.py"),
+                            "--fake-embeddings", "--db", db_directory], check=True)
+    os.environ["POKEDEX_DB"] = db_directory
+
+    print(f"⏳ Loading the Professor ({mode} backends)...")
+    import chat
+    chat.wait_until_ready()
+    chat.retriever.verbose = False
+    chat.self_query_retriever.verbose = False
+    search_timer = SearchTimer(chat.db)
+    tools = {t.name: t for t in chat.tools}
+    llm = chat.make_chat_model()
+    llm.tags = ["agent"] # So the timer can tell the agent's turns from the SelfQuery LLM's
+    agent_executor = chat.build_agent_executor(llm, verbose=False)
+
+    # 2. Retrieval and tools, one question at a time
+    print(f"🔎 Retrieval + tools over {len(questions)} questions x {args.repeat}...")
+    records = []
+    for _ in range(args.repeat):
+        for question in questions:
+            records.append({"id": question['id'], "category": question['category'],
+                            **run_retrieval(chat, search_timer, question), **run_tool(tools, question)})
+
+    # 3. The full agent, `concurrency` questions at a time
+    print(f"🤖 Agent over {len(questions)} questions x {args.repeat} ({args.concurrency} at a time)...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        agent_runs = list(pool.map(lambda q: run_agent(agent_executor, q), questions * args.repeat))
+    agent_wall = time.perf_counter() - start
+    for record, run in zip(records, agent_runs):
+        record.update(run)
+
+    # 4. Summary
+    samples = defaultdict(list)
+    for record in records:
+        for stage in STAGES:
+            value = record.get(stage)
+            if isinstance(value, list):
+                samples[stage] += value
+            elif value is not None:
+                samples[stage].append(value)
+    by_category = defaultdict(list)
+    for record in records:
+        by_category[record['category']].append(record['recall'])
+
+    results = {
+        "mode": mode,
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "questions": len(questions),
+        "repeat": args.repeat,
+        "concurrency": args.concurrency,
+        "startup": {"ready_seconds": round(chat.STARTUP.ready_after, 3),
+                    "stages_ms": {k: round(v * 1000, 1) for k, v in chat.STARTUP.timings.items()}},
+        "latency": {stage: latency_stats(samples[stage]) for stage in STAGES},
+        "throughput_qps": round(len(agent_runs) / agent_wall, 3),
+        "recall_at_k": mean(r['recall'] for r in records),
+        "recall_by_category": {category: mean(values) for category, values in by_category.items()},
+        "fast_path_share": mean(r['path'] == "fast" for r in records),
+        "tool_accuracy": mean(r.get('tool_correct') for r in records),
+        "agent_errors": sum(1 for r in records if r['error']),
+        "records": records,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{mode}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+
+    print(f"\n✅ Done! {len(records)} runs, {results['throughput_qps']} questions/s through the agent.")
+    for stage in STAGES:
+        stats = results['latency'][stage]
+        if stats:
+            print(f"   {stage:<20} p50 {stats['p50_ms']:9.2f} ms   p95 {stats['p95_ms']:9.2f} ms   (n={stats['count']})")
+    print(f"   recall@{chat.retriever.k}: {results['recall_at_k']} {results['recall_by_category']}")
+    print(f"   tool accuracy: {results['tool_accuracy']}, fast path: {results['fast_path_share']}, "
+          f"agent errors: {results['agent_errors']}")
+    print(f"💾 Saved to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+import sys
+import time
+
+# The reader lives in src/ next to chat.py, which loads the compiled file
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from pokedex_store import BIN_FILE, compile_pokedex
+
+# CONFIGURATION
+JSON_FILE = "./pokedex/pokedex.json"
+
+def main():
+    if not os.path.exists(JSON_FILE):
+        print(f"❌ Error: {JSON_FILE} not found. Run the download script first.")
+        return
+
+    print(f"🔧 Compiling {JSON_FILE} -> {BIN_FILE}...")
+    start = time.perf_counter()
+    count = compile_pokedex(JSON_FILE, BIN_FILE)
+    size_json = os.path.getsize(JSON_FILE) / 1024 / 1024
+    size_bin = os.path.getsize(BIN_FILE) / 1024 / 1024
+    print(f"✅ Done! {count} entries, {size_json:.1f} MB -> {size_bin:.1f} MB in {time.perf_counter() - start:.2f}s")
+    print("   chat.py also does this automatically whenever the JSON is newer than the compiled file.")
+
+if __name__ == "__main__":
+    main()
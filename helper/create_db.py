@@ -1,77 +1,176 @@
+import argparse
+import hashlib
 import json
 import os
+import sys
+import chromadb
 from langchain_chroma import Chroma
 from langchain_ollama import OllamaEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from embedding_pipeline import BATCH_SIZE, FAKE_EMBEDDING_SIZE, MAX_CONCURRENT_BATCHES, embed_and_store
+from pokedex_transforms import iter_entries
+
+# The embedding cache lives in src/ because chat.py uses it for queries too
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from embedding_cache import CACHE_FILE as EMBEDDING_CACHE_FILE, CachedEmbeddings
+from keyword_index import INDEX_FILE_NAME, KeywordIndex
+from filter_index import generation_of, type_mask
+from pokedex_store import source_signature
 
 # CONFIGURATION
 JSON_FILE = "./pokedex/pokedex.json"
 DB_DIRECTORY = "./pokedex_db"  # Folder where the vector DB will be saved
+COLLECTION_NAME = "pokedex_collection"
+EMBEDDING_MODEL = "nomic-embed-text"
+
+def document_id(p):
+    """Stable vector DB id, so re-running the script updates an entry instead of duplicating it."""
+    return f"pokemon-{p['id']}"
+
+def content_hash(text_blob, metadata):
+    """Fingerprint of everything we store for one entry. If it changes, the entry gets re-embedded."""
+    payload = json.dumps({"text": text_blob, "metadata": metadata}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def build_document(p):
+    # A. The Blob (What the AI reads)
+    # We use the pre-made string from your download script
+    text_blob = p.get('search_content')
+
+    # B. The Metadata (What the Code filters)
+    # We flatten the stats so they are easier to query (e.g. metadata['speed'] > 50)
+    types = p['types'] or ["Unknown"]
+    metadata = {
+        "name": p['name'],
+        "id": p['id'],
+        "generation": generation_of(p['id']),
+        # Primary type / ability for easy filtering, plus the full sets (filtered with $contains)
+        "type": types[0],
+        "secondary_type": types[1] if len(types) > 1 else "none",
+        "types": types,
+        "type_mask": type_mask(types), # One bit per type, see filter_index.TYPE_ORDER
+        "color": p['color'],
+        "shape": p['shape'],
+        "ability": p['abilities'][0],
+        "abilities": p['abilities'],
+        # Add stats individually for "SelfQueryRetriever" filtering
+        "hp": p['stats']['hp'],
+        "attack": p['stats']['attack'],
+        "defense": p['stats']['defense'],
+        "speed": p['stats']['speed'],
+        "special_attack": p['stats']['special-attack'],
+        "special_defense": p['stats']['special-defense'],
+        "total": sum(p['stats'].values())
+    }
+    metadata["content_hash"] = content_hash(text_blob, metadata)
+
+    return Document(page_content=text_blob, metadata=metadata)
+
+def plan_sync(documents, existing):
+    """
+    Compares the fresh documents with what is already in the DB.
+    `documents` is {id: Document}, `existing` is {id: content_hash}.
+    Returns (ids to embed and upsert, ids to delete).
+    """
+    to_upsert = [doc_id for doc_id, doc in documents.items()
+                 if existing.get(doc_id) != doc.metadata["content_hash"]]
+    to_delete = [doc_id for doc_id in existing if doc_id not in documents]
+    return to_upsert, to_delete
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Create or update the Pokedex vector database.")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the collection and re-embed every entry")
+    parser.add_argument("--db", default=DB_DIRECTORY, help="Folder of the Chroma database")
+    parser.add_argument("--batch-size", type=positive_int, default=BATCH_SIZE, help="Documents per embedding request")
+    parser.add_argument("--concurrency", type=positive_int, default=MAX_CONCURRENT_BATCHES, help="Embedding requests in flight at once")
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="Use a deterministic fake embedding model (benchmarks without Ollama)")
+    parser.add_argument("--embedding-cache", default=EMBEDDING_CACHE_FILE, help="SQLite file of cached embeddings")
+    parser.add_argument("--no-embedding-cache", action="store_true", help="Always call the embedding model")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+
     # 1. Load the Raw Data
     if not os.path.exists(JSON_FILE):
         print(f"❌ Error: {JSON_FILE} not found. Run the download script first.")
         return
 
-    print(f"📂 Loading data from {JSON_FILE}...")
-    with open(JSON_FILE, "r", encoding="utf-8") as f:
-        pokedex_data = json.load(f)
-
     # 2. Convert to LangChain 'Documents'
     # We split the data: 'search_content' goes to Blob, 'stats/type' goes to Metadata
-    documents = []
-    
-    for p in pokedex_data:
-        # A. The Blob (What the AI reads)
-        # We use the pre-made string from your download script
-        text_blob = p.get('search_content')
-        
-        # B. The Metadata (What the Code filters)
-        # We flatten the stats so they are easier to query (e.g. metadata['speed'] > 50)
-        metadata = {
-            "name": p['name'],
-            "id": p['id'],
-            # Store primary type for easy filtering
-            "type": p['types'][0] if p['types'] else "Unknown", 
-            "color": p['color'],
-            "shape": p['shape'],
-            "ability": p['abilities'][0],
-            # Add stats individually for "SelfQueryRetriever" filtering
-            "hp": p['stats']['hp'],
-            "attack": p['stats']['attack'],
-            "defense": p['stats']['defense'],
-            "speed": p['stats']['speed'],
-            "special_attack": p['stats']['special-attack'],
-            "special_defense": p['stats']['special-defense']
-        }
-        
-        doc = Document(page_content=text_blob, metadata=metadata)
-        documents.append(doc)
+    # Entries are read one at a time, so the raw pokedex (moves lists and all) is never in memory at once
+    print(f"📂 Loading data from {JSON_FILE}...")
+    documents = {document_id(p): build_document(p) for p in iter_entries(JSON_FILE)}
 
     print(f"📝 Prepared {len(documents)} documents.")
 
     # 3. Initialize the Embedding Model
-    # IMPORTANT: Use 'nomic-embed-text' for speed/quality. 
+    # IMPORTANT: Use 'nomic-embed-text' for speed/quality.
     # If you haven't pulled it yet, run: ollama pull nomic-embed-text
-    print("🧠 Initializing Embedding Model (nomic-embed-text)...")
-    embeddings = OllamaEmbeddings(model="nomic-embed-text")
-
-    # 4. Create (or Update) the Vector Database
-    print(f"💾 Saving to {DB_DIRECTORY}... (This might take a minute)")
-    
-    # from_documents automatically:
-    # 1. Sends text to Ollama -> Gets Vectors
-    # 2. Saves Vectors + Metadata to the folder
-    vector_store = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        persist_directory=DB_DIRECTORY,
-        collection_name="pokedex_collection" 
+    if args.fake_embeddings:
+        print(f"🧪 Using deterministic fake embeddings (size {FAKE_EMBEDDING_SIZE})...")
+        model_name = f"fake-{FAKE_EMBEDDING_SIZE}"
+        embeddings = DeterministicFakeEmbedding(size=FAKE_EMBEDDING_SIZE)
+    else:
+        print(f"🧠 Initializing Embedding Model ({EMBEDDING_MODEL})...")
+        model_name = EMBEDDING_MODEL
+        embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL)
+
+    # Identical text (e.g. after a --rebuild) is served from the cache instead of the model
+    if not args.no_embedding_cache:
+        embeddings = CachedEmbeddings(embeddings, model_name, path=args.embedding_cache)
+
+    # 4. Open (or Create) the Vector Database
+    client = chromadb.PersistentClient(path=args.db)
+    vector_store = Chroma(
+        client=client,
+        embedding_function=embeddings,
+        collection_name=COLLECTION_NAME
     )
+    if args.rebuild:
+        print("🗑️ Rebuild requested, dropping the existing collection...")
+        vector_store.reset_collection()
+
+    # 5. Work out what changed since the last run
+    # Only new or edited entries are sent to Ollama, entries that are gone from the JSON are removed.
+    stored = vector_store.get(include=["metadatas"])
+    existing = {doc_id: (meta or {}).get("content_hash") for doc_id, meta in zip(stored["ids"], stored["metadatas"])}
+    to_upsert, to_delete = plan_sync(documents, existing)
+    print(f"🔄 {len(existing)} entries in DB: {len(to_upsert)} new/changed, {len(to_delete)} removed, "
+          f"{len(documents) - len(to_upsert)} unchanged.")
+
+    if to_delete:
+        vector_store.delete(ids=to_delete)
+
+    if to_upsert:
+        print(f"💾 Embedding and saving to {args.db} "
+              f"(batches of {args.batch_size}, {args.concurrency} in flight)...")
+        # Batches are upserted by id as they finish, so changed entries are replaced
+        stats = embed_and_store(
+            client.get_collection(COLLECTION_NAME), embeddings, [documents[doc_id] for doc_id in to_upsert], to_upsert,
+            batch_size=args.batch_size, concurrency=args.concurrency
+        )
+        print(f"📊 {stats.summary()}")
+        if isinstance(embeddings, CachedEmbeddings):
+            print(f"   {embeddings.summary()}")
+
+    # 6. Keyword index over the same text, saved next to the vector DB
+    # Cheap to rebuild (no model calls), so it is always rebuilt from the full pokedex.
+    index_path = os.path.join(args.db, INDEX_FILE_NAME)
+    keyword_index = KeywordIndex.build((doc.metadata["id"], doc.page_content) for doc in documents.values())
+    keyword_index.save(index_path, source=list(source_signature(JSON_FILE)))
+    print(f"🔤 Keyword index: {len(keyword_index.postings)} terms saved to {index_path}")
 
-    print("✅ Success! Database created.")
-    print(f"   To use it, load Chroma with persist_directory='{DB_DIRECTORY}'")
+    print("✅ Success! Database is up to date.")
+    print(f"   To use it, load Chroma with persist_directory='{args.db}'")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,175 +2,342 @@ import requests
 import json
 import time
 import os
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from response_cache import CACHE_FILE, ResponseCache
 
 # CONFIGURATION
 # Set to high number to download ALL pokemon (1000+), or an integer (e.g., 151) for Gen 1.
 POKEMON_LIMIT = 1025
 OFFSET = 0 # Used to skip to later generations (e.g., 151 for Gen 2)
 OUTPUT_FILE = "./pokedex/pokedex.json"
+EVOLUTION_FILE = "./pokedex/evolution_graph.json" # Structured evolution edges, loaded by chat.py
+CHECKPOINT_FILE = "./pokedex/pokedex.checkpoint.jsonl" # One finished entry per line, lets a crashed run resume
+API_BASE = os.environ.get("POKEAPI_BASE", "https://pokeapi.co/api/v2") # Point at a local server for testing
+MAX_WORKERS = 16 # Pokemon processed in parallel (1 = the old one-at-a-time behaviour)
+REQUESTS_PER_SECOND = 20 # Shared budget for ALL workers, replaces the fixed sleep between Pokemon
 
-def fetch_json(url):
+def fetch_json(url, session=None):
     """Helper to fetch JSON with simple error handling and rate limiting."""
     try:
-        response = requests.get(url)
+        response = (session or requests).get(url, timeout=30)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {url}: {e}")
         return None
 
-def get_evolution_chain(chain_url):
-    """Fetches and parses the evolution chain recursively, handling ALL evolution conditions."""
-    data = fetch_json(chain_url)
+class TokenBucket:
+    """Thread-safe token bucket. Each request takes one token, tokens refill at `rate` per second."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        # At least one whole token, or a rate below 1/s could never pay for a request
+        self.capacity = max(1.0, capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class Fetcher:
+    """
+    Shared HTTP client for one download run.
+    - One pooled requests.Session for every worker (keeps connections alive).
+    - A TokenBucket so all workers together respect REQUESTS_PER_SECOND.
+    - A per-run memo of URL -> JSON. Evolution chains are shared by every species in the
+      chain, so the first worker fetches it and everyone else reuses the result.
+    - An optional on-disk ResponseCache. Cached URLs are revalidated with conditional
+      requests, and in offline mode they are served without touching the network at all.
+    """
+
+    def __init__(self, workers=MAX_WORKERS, rate=REQUESTS_PER_SECOND, cache=None, offline=False):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.limiter = TokenBucket(rate) if rate else None
+        self.cache = cache
+        self.offline = offline
+        self.memo = {}
+        self.lock = threading.Lock()
+        self.requests_made = 0
+        self.memo_hits = 0
+
+    def get(self, url, memo=True):
+        # /pokemon payloads are large and only used once, so only species/chain URLs are memoized
+        if not memo:
+            return self._fetch(url)
+
+        # Only one worker fetches a given URL, the others wait on its Future
+        with self.lock:
+            future = self.memo.get(url)
+            owner = future is None
+            if owner:
+                future = self.memo[url] = Future()
+            else:
+                self.memo_hits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            data = self._fetch(url)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        future.set_result(data)
+        return data
+
+    def _fetch(self, url):
+        if not self.cache:
+            return self._request(url)
+
+        entry = self.cache.get(url)
+        if self.offline:
+            if entry is None:
+                self.cache.record_miss()
+                print(f"Offline: {url} is not cached")
+                return None
+            self.cache.record_hit(entry[0])
+            return json.loads(entry[0])
+
+        headers = ResponseCache.conditional_headers(entry)
+        response = self._request(url, headers=headers, raw=True)
+        if response is None:
+            # Network failed, a stale copy is better than nothing
+            return json.loads(entry[0]) if entry else None
+
+        if response.status_code == 304 and entry:
+            self.cache.record_hit(entry[0])
+            return json.loads(entry[0])
+
+        self.cache.record_miss()
+        self.cache.put(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.json()
+
+    def _request(self, url, headers=None, raw=False):
+        if self.limiter:
+            self.limiter.acquire()
+        with self.lock:
+            self.requests_made += 1
+        if not raw:
+            return fetch_json(url, self.session)
+        try:
+            response = self.session.get(url, headers=headers, timeout=30)
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+    def close(self):
+        self.session.close()
+
+def describe_evolution(details):
+    """
+    Turns one PokeAPI `evolution_details` record into (method sentence, trigger, conditions).
+    The sentence is what ends up in `evolution_info`, the trigger and conditions dict go
+    into the evolution graph (e.g. {"min_level": 16} or {"item": "water stone"}).
+    """
+    # --- 1. DETERMINE THE BASE TRIGGER ---
+    trigger = details.get('trigger', {}).get('name')
+    conditions = [] # We will add requirements to this list
+    structured = {}
+
+    base_action = "evolving" # Fallback
+
+    if trigger == "level-up":
+        base_action = "leveling up"
+        if details.get('min_level'):
+            conditions.append(f"starting at level {details['min_level']}")
+            structured['min_level'] = details['min_level']
+
+    elif trigger == "trade":
+        base_action = "trading"
+        if details.get('trade_species'):
+            tr_species = clean_name(details['trade_species']['name'])
+            conditions.append(f"with {tr_species}")
+            structured['trade_species'] = tr_species
+
+    elif trigger == "use-item":
+        item_name = clean_name(details.get('item', {}).get('name', 'unknown item'))
+        base_action = f"using {item_name}"
+        structured['item'] = item_name
+
+    elif trigger == "shed":
+        base_action = "shedding shell (needs space in party)"
+
+    elif trigger == "other":
+        base_action = "special condition"
+
+    # --- 2. CHECK ALL ADDITIVE CONDITIONS ---
+
+    # Time of Day (e.g., Umbreon)
+    if details.get('time_of_day'):
+        conditions.append(f"during the {details['time_of_day']}")
+        structured['time_of_day'] = details['time_of_day']
+
+    # Held Item (e.g., Sneasel, Trade evos)
+    if details.get('held_item'):
+        item = clean_name(details['held_item']['name'])
+        conditions.append(f"while holding {item}")
+        structured['held_item'] = item
+
+    # Friendship/Happiness (e.g., Pichu)
+    if details.get('min_happiness'):
+        conditions.append("with high friendship")
+        structured['min_happiness'] = details['min_happiness']
+
+    # Affection (e.g., Sylveon)
+    if details.get('min_affection'):
+        conditions.append("with high affection")
+        structured['min_affection'] = details['min_affection']
+
+    # Beauty (e.g., Feebas)
+    if details.get('min_beauty'):
+        conditions.append("with high beauty")
+        structured['min_beauty'] = details['min_beauty']
+
+    # Location (e.g., Leafeon/Glaceon)
+    if details.get('location'):
+        loc = clean_name(details['location']['name'])
+        conditions.append(f"at {loc}")
+        structured['location'] = loc
+
+    # Known Move (e.g., Tangela, Yanma)
+    if details.get('known_move'):
+        move = clean_name(details['known_move']['name'])
+        conditions.append(f"knowing the move {move}")
+        structured['known_move'] = move
+
+    # Known Move Type (e.g., Sylveon needs Fairy move)
+    if details.get('known_move_type'):
+        m_type = clean_name(details['known_move_type']['name'])
+        conditions.append(f"knowing a {m_type} type move")
+        structured['known_move_type'] = m_type
+
+    # Gender (e.g., Gallade/Froslass)
+    # 1 = Female, 2 = Male (per PokeAPI docs)
+    gender = details.get('gender')
+    if gender == 1:
+        conditions.append("(female only)")
+        structured['gender'] = "female"
+    elif gender == 2:
+        conditions.append("(male only)")
+        structured['gender'] = "male"
+
+    # Weather (e.g., Sliggoo)
+    if details.get('needs_overworld_rain'):
+        conditions.append("while raining")
+        structured['needs_overworld_rain'] = True
+
+    # Upside Down (e.g., Inkay)
+    if details.get('turn_upside_down'):
+        conditions.append("while holding the console upside down")
+        structured['turn_upside_down'] = True
+
+    # Party Species (e.g., Mantyke needs Remoraid)
+    if details.get('party_species'):
+        p_species = clean_name(details['party_species']['name'])
+        conditions.append(f"with {p_species} in party")
+        structured['party_species'] = p_species
+
+    # Party Type (e.g., Pancham needs Dark type)
+    if details.get('party_type'):
+        p_type = clean_name(details['party_type']['name'])
+        conditions.append(f"with a {p_type} type in party")
+        structured['party_type'] = p_type
+
+    # Relative Physical Stats (e.g., Tyrogue)
+    # 1: Atk > Def, -1: Def > Atk, 0: Atk = Def
+    stats_relation = details.get('relative_physical_stats')
+    if stats_relation == 1:
+        conditions.append("if Attack > Defense")
+    elif stats_relation == -1:
+        conditions.append("if Defense > Attack")
+    elif stats_relation == 0:
+        conditions.append("if Attack = Defense")
+    if stats_relation is not None:
+        structured['relative_physical_stats'] = stats_relation
+
+    # --- 3. CONSTRUCT THE SENTENCE ---
+
+    # Join all conditions with spaces
+    condition_string = " ".join(conditions)
+
+    # Make formatting clean
+    if condition_string:
+        final_method = f"{base_action} {condition_string}"
+    else:
+        final_method = base_action
+
+    # Clean up double spaces if any
+    return " ".join(final_method.split()), trigger, structured
+
+def get_evolution_edges(chain_url, fetch=fetch_json):
+    """
+    Fetches the evolution chain and flattens PokeAPI's tree into a list of edges:
+    {"from": "Eevee", "to": "Vaporeon", "trigger": "use-item", "conditions": {"item": "water stone"}, "method": "using water stone"}
+    Returns None if the chain couldn't be downloaded.
+    """
+    data = fetch(chain_url)
     if not data:
-        return "Unknown"
-    
+        return None
+
     chain = data['chain']
-    evo_list = []
-    
+    edges = []
+
     def parse_chain(node):
         species_name = clean_name(node['species']['name']).title()
-        
+
         # Check if there are evolutions
         if node['evolves_to']:
             for next_node in node['evolves_to']:
                 next_species_name = clean_name(next_node['species']['name']).title()
-                
+
                 # Some pokmeon have empty details (like babies/base forms in certain contexts), skip if empty
                 if not next_node['evolution_details']:
                     continue
-                    
+
                 # We typically take the first evolution method listed (index 0)
-                # In rare cases there are multiple ways to get to the SAME pokemon, 
+                # In rare cases there are multiple ways to get to the SAME pokemon,
                 # but usually index 0 is the standard way.
-                details = next_node['evolution_details'][0]
-                
-                # --- 1. DETERMINE THE BASE TRIGGER ---
-                trigger = details.get('trigger', {}).get('name')
-                conditions = [] # We will add requirements to this list
-                
-                base_action = "evolving" # Fallback
-                
-                if trigger == "level-up":
-                    base_action = "leveling up"
-                    if details.get('min_level'):
-                        conditions.append(f"starting at level {details['min_level']}")
-                
-                elif trigger == "trade":
-                    base_action = "trading"
-                    if details.get('trade_species'):
-                        tr_species = clean_name(details['trade_species']['name'])
-                        conditions.append(f"with {tr_species}")
-                        
-                elif trigger == "use-item":
-                    item_name = clean_name(details.get('item', {}).get('name', 'unknown item'))
-                    base_action = f"using {item_name}"
-                    
-                elif trigger == "shed":
-                    base_action = "shedding shell (needs space in party)"
-                    
-                elif trigger == "other":
-                    base_action = "special condition"
-
-                # --- 2. CHECK ALL ADDITIVE CONDITIONS ---
-                
-                # Time of Day (e.g., Umbreon)
-                if details.get('time_of_day'):
-                    conditions.append(f"during the {details['time_of_day']}")
-
-                # Held Item (e.g., Sneasel, Trade evos)
-                if details.get('held_item'):
-                    item = clean_name(details['held_item']['name'])
-                    conditions.append(f"while holding {item}")
-
-                # Friendship/Happiness (e.g., Pichu)
-                if details.get('min_happiness'):
-                    conditions.append("with high friendship")
-
-                # Affection (e.g., Sylveon)
-                if details.get('min_affection'):
-                    conditions.append("with high affection")
-
-                # Beauty (e.g., Feebas)
-                if details.get('min_beauty'):
-                    conditions.append("with high beauty")
-
-                # Location (e.g., Leafeon/Glaceon)
-                if details.get('location'):
-                    loc = clean_name(details['location']['name'])
-                    conditions.append(f"at {loc}")
-
-                # Known Move (e.g., Tangela, Yanma)
-                if details.get('known_move'):
-                    move = clean_name(details['known_move']['name'])
-                    conditions.append(f"knowing the move {move}")
-
-                # Known Move Type (e.g., Sylveon needs Fairy move)
-                if details.get('known_move_type'):
-                    m_type = clean_name(details['known_move_type']['name'])
-                    conditions.append(f"knowing a {m_type} type move")
-
-                # Gender (e.g., Gallade/Froslass)
-                # 1 = Female, 2 = Male (per PokeAPI docs)
-                gender = details.get('gender')
-                if gender == 1:
-                    conditions.append("(female only)")
-                elif gender == 2:
-                    conditions.append("(male only)")
-
-                # Weather (e.g., Sliggoo)
-                if details.get('needs_overworld_rain'):
-                    conditions.append("while raining")
-
-                # Upside Down (e.g., Inkay)
-                if details.get('turn_upside_down'):
-                    conditions.append("while holding the console upside down")
-
-                # Party Species (e.g., Mantyke needs Remoraid)
-                if details.get('party_species'):
-                    p_species = clean_name(details['party_species']['name'])
-                    conditions.append(f"with {p_species} in party")
-                
-                # Party Type (e.g., Pancham needs Dark type)
-                if details.get('party_type'):
-                    p_type = clean_name(details['party_type']['name'])
-                    conditions.append(f"with a {p_type} type in party")
-
-                # Relative Physical Stats (e.g., Tyrogue)
-                # 1: Atk > Def, -1: Def > Atk, 0: Atk = Def
-                stats_relation = details.get('relative_physical_stats')
-                if stats_relation == 1:
-                    conditions.append("if Attack > Defense")
-                elif stats_relation == -1:
-                    conditions.append("if Defense > Attack")
-                elif stats_relation == 0:
-                    conditions.append("if Attack = Defense")
-
-                # --- 3. CONSTRUCT THE SENTENCE ---
-                
-                # Join all conditions with spaces
-                condition_string = " ".join(conditions)
-                
-                # Make formatting clean
-                if condition_string:
-                    final_method = f"{base_action} {condition_string}"
-                else:
-                    final_method = base_action
-
-                # Clean up double spaces if any
-                final_method = " ".join(final_method.split())
-
-                evo_string = f"{species_name} evolves into {next_species_name} via {final_method}"
-                evo_list.append(evo_string)
-                
+                method, trigger, conditions = describe_evolution(next_node['evolution_details'][0])
+                edges.append({"from": species_name, "to": next_species_name,
+                              "trigger": trigger, "conditions": conditions, "method": method})
+
                 # Recursively parse the next link in the chain
                 parse_chain(next_node)
-        
+
     parse_chain(chain)
-    
+    return edges
+
+def evolution_text(edges):
+    """The prose stored in `evolution_info`, one sentence per edge."""
+    if edges is None:
+        return "Unknown"
+    evo_list = [f"{edge['from']} evolves into {edge['to']} via {edge['method']}" for edge in edges]
     # Return formatted string
     return ". ".join(evo_list) + "." if evo_list else "This Pokemon does not evolve."
 
+def get_evolution_chain(chain_url, fetch=fetch_json):
+    """Fetches and parses the evolution chain recursively, handling ALL evolution conditions."""
+    return evolution_text(get_evolution_edges(chain_url, fetch=fetch))
+
 def clean_name(name):
         """Helper to replace hyphens with spaces."""
         return name.replace('-', ' ') if name else "unknown"
@@ -179,80 +346,208 @@ def clean_text(text):
     """Removes newlines and form feeds from PokeAPI flavor text."""
     return text.replace('\n', ' ').replace('\f', ' ').strip()
 
+def build_entry(name, p_data, s_data, evolution_text):
+    """Flattens the raw /pokemon and /pokemon-species payloads into one pokedex entry."""
+    # Extract English Flavor Text (Description)
+    description = "No description available."
+    for entry in s_data['flavor_text_entries']:
+        if entry['language']['name'] == 'en':
+            description = clean_text(entry['flavor_text'])
+            break # Just take the first English one found
+
+    processed_variants = [clean_name(v['pokemon']['name']) for v in s_data['varieties'][1:]] # Skip first as it's the default form
+
+    types = [t['type']['name'] for t in p_data['types']]
+    abilities = [a['ability']['name'] for a in p_data['abilities']]
+    stats_text = ", ".join(f"{s['stat']['name'].capitalize()} {s['base_stat']}" for s in p_data['stats'])
+    variants_text = "Variants: No Variants" if not processed_variants else "Variants: "
+
+    # Format Data for the LLM
+    # We flatten the structure so the LLM can read it easily.
+    return {
+        "name": name.capitalize(),
+        "id": p_data['id'],
+        "types": types,
+        "color": s_data['color']['name'],
+        "shape": s_data['shape']['name'],
+        "abilities": abilities,
+        "stats": {s['stat']['name']: s['base_stat'] for s in p_data['stats']},
+        "moves": [m['move']['name'] for m in p_data['moves']],
+        "variants": processed_variants,
+        "description": description,
+        "evolution_info": evolution_text,
+        # Create a "blob" of text for the Vector DB to index later
+        "search_content": f"Name: {name.capitalize()}. Color: {s_data['color']['name']}. Shape: {s_data['shape']['name']}. Types: {'/'.join(types)}. Abilities: {', '.join(abilities)}. Stats: {stats_text}. {variants_text}{', '.join(processed_variants)}. Description: {description} Evolution: {evolution_text}"
+    }
+
+def process_pokemon(p, fetcher):
+    """Downloads everything needed for one Pokemon. Returns None if any request failed."""
+    name = p['name']
+
+    # 1. Get Main Pokemon Data (Types, Stats)
+    p_data = fetcher.get(p['url'], memo=False)
+    if not p_data: return None
+
+    # 2. Get Species Data (Description, Evolution URL)
+    s_data = fetcher.get(p_data['species']['url'])
+    if not s_data: return None
+
+    # 3. Get Evolution Chain (memoized, so each chain is only downloaded once per run)
+    # A failed chain fails the entry: checkpointed as "Unknown", a resumed run would never retry it
+    edges = get_evolution_edges(s_data['evolution_chain']['url'], fetch=fetcher.get)
+    if edges is None: return None
+
+    entry = build_entry(name, p_data, s_data, evolution_text(edges))
+    # Kept in the checkpoint for the evolution graph, left out of pokedex.json
+    entry[EDGES_KEY] = edges
+    return entry
+
+EDGES_KEY = "evolution_edges"
+
+def build_evolution_graph(entries):
+    """Every distinct edge of every chain seen (members of one chain all carry the same edges)."""
+    edges = {}
+    for entry in entries:
+        for edge in entry.get(EDGES_KEY, []):
+            edges.setdefault((edge['from'], edge['to']), edge)
+    return {"edges": [edges[key] for key in sorted(edges)]}
+
+def pokemon_id_from_url(url):
+    """'https://pokeapi.co/api/v2/pokemon/25/' -> 25"""
+    return int(url.rstrip('/').split('/')[-1])
+
+def load_checkpoint(path):
+    """
+    Reads every finished entry from the JSONL checkpoint, keyed by Pokemon id.
+    A run killed mid-write can leave a broken last line, so bad lines are dropped
+    and the file is rewritten without them before we append to it again.
+    Entries an older run saved without their evolution chain ("Unknown") are dropped too, so they get retried.
+    """
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+
+    broken = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                broken += 1
+                continue
+            entries[entry['id']] = entry # Later lines win if an entry was re-downloaded
+
+    unknown = [pid for pid, entry in entries.items() if entry.get('evolution_info') == "Unknown"]
+    for pid in unknown:
+        del entries[pid]
+    if broken or unknown:
+        print(f"⚠️ Dropped {broken} broken line(s) and {len(unknown)} entries missing their evolution chain from {path}")
+        write_atomic(path, "".join(json.dumps(e) + "\n" for e in entries.values()))
+    return entries
+
+def write_atomic(path, text):
+    """Writes to a temp file next to `path` then swaps it in, so readers never see half a file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def positive_rate(value):
+    rate = float(value)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"must be above 0, got {value}")
+    return rate
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download the Pokedex from PokeAPI.")
+    parser.add_argument("--limit", type=int, default=POKEMON_LIMIT, help="How many Pokemon to download")
+    parser.add_argument("--offset", type=int, default=OFFSET, help="How many Pokemon to skip")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Where to write the pokedex JSON")
+    parser.add_argument("--evolution-output", default=EVOLUTION_FILE, help="Where to write the evolution graph JSON")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="JSONL file of finished entries used to resume")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the checkpoint and download every entry again")
+    parser.add_argument("--base-url", default=API_BASE, help="PokeAPI base URL (e.g. a local stand-in server)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Pokemon downloaded in parallel")
+    parser.add_argument("--rate", type=positive_rate, default=REQUESTS_PER_SECOND, help="Max requests per second, shared by all workers (e.g. 0.5)")
+    parser.add_argument("--cache", default=CACHE_FILE, help="SQLite file used as the HTTP response cache")
+    parser.add_argument("--no-cache", action="store_true", help="Always download everything from scratch")
+    parser.add_argument("--offline", action="store_true", help="Build only from the response cache, no network")
+    return parser.parse_args()
+
 def main():
-    access = "w"
-    # Check if pokedex was populated, if so, then we'll append to the file
-    # CAN'T APPEND SINCE JSON WILL ADD IT AS ANOTHER LIST INSTEAD OF APPENDING TO THE EXISTING LIST
-    # if os.path.exists(OUTPUT_FILE):
-    #     access = "a"
-    #     with open(OUTPUT_FILE, "r", encoding='utf-8') as f:
-    #         OFFSET = len(json.load(f))
-    #     print(f"📂 Existing Pokedex found with {OFFSET} entries. Appending")
-    print(f"🚀 Starting Pokedex download (Limit: {POKEMON_LIMIT})...")
+    args = parse_args()
+    print(f"🚀 Starting Pokedex download (Limit: {args.limit}, Workers: {args.workers}, Rate: {args.rate}/s)...")
+    start = time.perf_counter()
+    if args.offline and args.no_cache:
+        print("❌ Error: --offline needs the response cache.")
+        return
+    cache = None if args.no_cache else ResponseCache(args.cache)
+    fetcher = Fetcher(workers=args.workers, rate=args.rate, cache=cache, offline=args.offline)
 
     # 1. Get the list of all Pokemon
-    list_url = f"https://pokeapi.co/api/v2/pokemon?limit={POKEMON_LIMIT}&offset={OFFSET}"
-    pokemon_list = fetch_json(list_url)['results']
-    
-    final_pokedex = []
-    
-    for index, p in enumerate(pokemon_list):
-        name = p['name']
-        print(f"[{index+1}/{POKEMON_LIMIT}] Fetching {name}...")
-        
-        # 2. Get Main Pokemon Data (Types, Stats)
-        p_data = fetch_json(p['url'])
-        if not p_data: continue
-
-        # 3. Get Species Data (Description, Evolution URL)
-        species_url = p_data['species']['url']
-        s_data = fetch_json(species_url)
-        if not s_data: continue
-        
-        # Extract English Flavor Text (Description)
-        description = "No description available."
-        for entry in s_data['flavor_text_entries']:
-            if entry['language']['name'] == 'en':
-                description = clean_text(entry['flavor_text'])
-                break # Just take the first English one found
-        
-        # 4. Get Evolution Chain (Only if we haven't cached this chain, but for simplicity we fetch)
-        # Note: In a production app, you would cache this URL to avoid re-fetching the same chain 3 times.
-        evo_chain_url = s_data['evolution_chain']['url']
-        evolution_text = get_evolution_chain(evo_chain_url)
-
-        processed_variants = [clean_name(v['pokemon']['name']) for v in s_data['varieties'][1:]] # Skip first as it's the default form
-
-        # 5. Format Data for the LLM
-        # We flatten the structure so the LLM can read it easily.
-        entry = {
-            "name": name.capitalize(),
-            "id": p_data['id'],
-            "types": [t['type']['name'] for t in p_data['types']],
-            "color": s_data['color']['name'],
-            "shape": s_data['shape']['name'],
-            "abilities": [a['ability']['name'] for a in p_data['abilities']],
-            "stats": {s['stat']['name']: s['base_stat'] for s in p_data['stats']},
-            "moves": [m['move']['name'] for m in p_data['moves']],
-            "variants": processed_variants,
-            "description": description,
-            "evolution_info": evolution_text,
-            # Create a "blob" of text for the Vector DB to index later
-            "search_content": f"Name: {name.capitalize()}. Color: {s_data['color']['name']}. Shape: {s_data['shape']['name']}. Types: {'/'.join([t['type']['name'] for t in p_data['types']])}. Abilities: {', '.join([a['ability']['name'] for a in p_data['abilities']])}. Stats: {", ".join([f'{s['stat']['name'].capitalize()} {s['base_stat']}' for s in p_data['stats']])}. {"Variants: No Variants" if not processed_variants else "Variants: " }{', '.join(processed_variants)}. Description: {description} Evolution: {evolution_text}"
-        }
-        
-        final_pokedex.append(entry)
-        
-        # Be nice to the API
-        time.sleep(0.1)
-    # access = "w"
-    # # Check if pokedex was populated, if so, then we'll append to the file
-    # if os.path.exists(OUTPUT_FILE):
-    #     access = "a"
-    with open(OUTPUT_FILE, "w", encoding='utf-8') as f:
-        json.dump(final_pokedex, f, indent=4)
-
-    print(f"\n✅ Done! Saved {len(final_pokedex)} entries to {OUTPUT_FILE}")
+    list_url = f"{args.base_url.rstrip('/')}/pokemon?limit={args.limit}&offset={args.offset}"
+    pokemon_list = fetcher.get(list_url, memo=False)
+    if not pokemon_list:
+        print(f"❌ Error: could not fetch the Pokemon list from {list_url}")
+        return
+    pokemon_list = pokemon_list['results']
+
+    # 2. Skip everything the checkpoint already has, only the missing ids get downloaded
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    finished = load_checkpoint(args.checkpoint)
+    missing = [p for p in pokemon_list if pokemon_id_from_url(p['url']) not in finished]
+    if finished:
+        print(f"📂 Checkpoint has {len(finished)} entries, {len(missing)} of {len(pokemon_list)} still missing.")
+    total = len(missing)
+
+    done = 0
+    failed = 0
+    checkpoint_lock = threading.Lock()
+
+    def worker(p):
+        nonlocal done, failed
+        entry = process_pokemon(p, fetcher)
+        with checkpoint_lock:
+            done += 1
+            if entry:
+                # Checkpoint straight away so a crash never loses finished work
+                checkpoint.write(json.dumps(entry) + "\n")
+                checkpoint.flush()
+                finished[entry['id']] = entry
+            else:
+                failed += 1
+            status = "✅" if entry else "❌"
+            print(f"[{done}/{total}] {status} {p['name']}")
+
+    # 3. Fetch the missing Pokemon in parallel
+    with open(args.checkpoint, "a", encoding="utf-8") as checkpoint:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            list(pool.map(worker, missing))
+    fetcher.close()
+
+    # 4. Write the final pokedex in one go, ordered by id
+    final_pokedex = [{k: v for k, v in finished[pid].items() if k != EDGES_KEY} for pid in sorted(finished)]
+    write_atomic(args.output, json.dumps(final_pokedex, indent=4))
+
+    # 5. And the evolution graph next to it
+    graph = build_evolution_graph(finished[pid] for pid in sorted(finished))
+    write_atomic(args.evolution_output, json.dumps(graph, indent=4))
+    without_edges = sum(1 for e in finished.values() if EDGES_KEY not in e)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Done! Saved {len(final_pokedex)} entries to {args.output}")
+    print(f"   {len(graph['edges'])} evolution edges saved to {args.evolution_output}")
+    if without_edges:
+        print(f"   ⚠️ {without_edges} checkpointed entries predate the evolution graph, use --fresh to include their chains.")
+    if failed:
+        print(f"   ⚠️ {failed} Pokemon failed, run the script again to retry just those.")
+    print(f"   {fetcher.requests_made} requests, {fetcher.memo_hits} duplicate fetches avoided, {elapsed:.1f}s")
+    if cache:
+        print(f"   {cache.summary()}")
+        cache.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,96 @@
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# CONFIGURATION
+BATCH_SIZE = 32 # Documents sent to the embedding model per request
+MAX_CONCURRENT_BATCHES = 4 # Embedding requests in flight at the same time
+FAKE_EMBEDDING_SIZE = 768 # Same width as nomic-embed-text, used by --fake-embeddings
+
+def percentile(values, pct):
+    """Nearest-rank percentile, good enough for a progress report."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class IngestStats:
+    """Throughput and latency numbers for one embedding run."""
+
+    def __init__(self, total_docs):
+        self.total_docs = total_docs
+        self.done_docs = 0
+        self.batch_latencies = []
+        self.start = time.perf_counter()
+
+    def record_batch(self, size, latency):
+        self.done_docs += size
+        self.batch_latencies.append(latency)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    @property
+    def docs_per_sec(self):
+        return self.done_docs / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        rate = self.docs_per_sec
+        return (self.total_docs - self.done_docs) / rate if rate > 0 else float("inf")
+
+    def progress_line(self):
+        return (f"[{self.done_docs}/{self.total_docs}] {self.docs_per_sec:.1f} docs/s, "
+                f"batch p50 {percentile(self.batch_latencies, 50):.2f}s "
+                f"p95 {percentile(self.batch_latencies, 95):.2f}s, ETA {self.eta:.0f}s")
+
+    def summary(self):
+        return (f"Embedded {self.done_docs} docs in {self.elapsed:.1f}s ({self.docs_per_sec:.1f} docs/s), "
+                f"{len(self.batch_latencies)} batches, p50 {percentile(self.batch_latencies, 50):.2f}s, "
+                f"p95 {percentile(self.batch_latencies, 95):.2f}s")
+
+def embed_and_store(collection, embeddings, documents, ids,
+                    batch_size=BATCH_SIZE, concurrency=MAX_CONCURRENT_BATCHES, report=print):
+    """
+    Streams `documents` through the embedding model and into a Chroma collection.
+    - Documents are embedded in batches of `batch_size`, with at most `concurrency`
+      embedding requests running at once (the rest wait, so memory stays bounded).
+    - Each batch is upserted into Chroma as soon as its vectors come back,
+      so an interrupted run keeps everything that was already written.
+    Returns the IngestStats of the run.
+    """
+    concurrency = max(1, concurrency)
+    stats = IngestStats(len(documents))
+    batches = deque(
+        (ids[i:i + batch_size], documents[i:i + batch_size])
+        for i in range(0, len(documents), batch_size)
+    )
+
+    def embed_batch(batch_ids, batch_docs):
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents([doc.page_content for doc in batch_docs])
+        return batch_ids, batch_docs, vectors, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = set()
+        while batches or pending:
+            # Keep the pool full, but never queue more than `concurrency` batches
+            while batches and len(pending) < concurrency:
+                pending.add(pool.submit(embed_batch, *batches.popleft()))
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                batch_ids, batch_docs, vectors, latency = future.result()
+                # Writes happen on this thread only, Chroma never sees concurrent upserts
+                collection.upsert(
+                    ids=batch_ids,
+                    embeddings=vectors,
+                    documents=[doc.page_content for doc in batch_docs],
+                    metadatas=[doc.metadata for doc in batch_docs],
+                )
+                stats.record_batch(len(batch_ids), latency)
+                report(f"   {stats.progress_line()}")
+
+    return stats
@@ -0,0 +1,98 @@
+import json
+import os
+
+CHUNK_SIZE = 64 * 1024 # Bytes read from disk at a time while streaming
+
+# field -> list of normalizer functions, filled in with @normalizer
+NORMALIZERS = {}
+
+def normalizer(field):
+    """
+    Registers a function as a normalizer for one field of every entry.
+    It is called as fn(value, original_entry) and returns the new value, so a field
+    like 'search_content' can see what the other fields looked like before this run.
+    Normalizers must be idempotent: running them on already clean data changes nothing.
+    """
+    def register(fn):
+        NORMALIZERS.setdefault(field, []).append(fn)
+        return fn
+    return register
+
+def iter_entries(path):
+    """Yields the objects of a top-level JSON array one at a time, without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            # Skip whitespace, the opening '[' and the commas between entries
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,[":
+                if buffer[pos] == "[":
+                    started = True
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            if pos < len(buffer) and started:
+                try:
+                    entry, end = decoder.raw_decode(buffer, pos)
+                    yield entry
+                    buffer, pos = buffer[end:], 0 # Drop what we've used, memory stays flat
+                    continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+            elif eof:
+                raise ValueError(f"{path} is not a JSON array")
+
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+def normalize_entry(entry):
+    """Applies every registered normalizer. Returns (new entry, whether anything changed)."""
+    result = dict(entry)
+    for field, functions in NORMALIZERS.items():
+        if field not in result:
+            continue
+        value = result[field]
+        for fn in functions:
+            value = fn(value, entry)
+        result[field] = value
+    return result, result != entry
+
+def transform_file(input_file, output_file=None):
+    """
+    Streams input_file through the registered normalizers into output_file (default: in place).
+    Entries are written one by one to a temp file that atomically replaces the output at the end,
+    in the same indent=4 layout json.dump uses. If nothing changed, the file is left untouched.
+    Returns (entries seen, entries changed).
+    """
+    output_file = output_file or input_file
+    tmp_path = f"{output_file}.tmp"
+    total = changed = 0
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write("[")
+            for entry in iter_entries(input_file):
+                entry, was_changed = normalize_entry(entry)
+                changed += was_changed
+                # json.dump(list, indent=4) puts every entry one level deep
+                body = json.dumps(entry, indent=4).replace("\n", "\n    ")
+                out.write(("," if total else "") + "\n    " + body)
+                total += 1
+            out.write("\n]" if total else "]")
+            out.flush()
+            os.fsync(out.fileno())
+
+        if changed or output_file != input_file:
+            os.replace(tmp_path, output_file)
+        else:
+            os.remove(tmp_path) # Already normalized, don't bump the mtime (chat.py would recompile)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return total, changed
@@ -1,41 +1,57 @@
-import json
+import argparse
 import os
+from download_pokedex import clean_name
+from pokedex_transforms import normalizer, transform_file
 
 # CONFIGURATION
 INPUT_FILE = "./pokedex/pokedex.json"
-OUTPUT_FILE = "./pokedex/pokedex_cleaned.json" # We save to a new file first for safety
+
+# The same hyphen -> space rule download_pokedex.py uses for evolution text, applied to every
+# field that holds PokeAPI identifiers. Each one is a no-op on already cleaned values.
+
+@normalizer("name")
+def clean_pokemon_name(name, entry):
+    return clean_name(name)
+
+@normalizer("moves")
+def clean_moves(moves, entry):
+    return [clean_name(move) for move in moves]
+
+@normalizer("abilities")
+def clean_abilities(abilities, entry):
+    return [clean_name(ability) for ability in abilities]
+
+@normalizer("variants")
+def clean_variants(variants, entry):
+    return [clean_name(variant) for variant in variants]
+
+@normalizer("search_content")
+def clean_search_content(text, entry):
+    # Only rewrite the identifiers we cleaned above, hyphens in the description stay as they are
+    for raw in [entry['name'], *entry['abilities'], *entry['variants']]:
+        if "-" in raw:
+            text = text.replace(raw, clean_name(raw))
+    return text
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Normalize names, moves, abilities and variants in the Pokedex.")
+    parser.add_argument("--input", default=INPUT_FILE, help="Pokedex JSON to clean")
+    parser.add_argument("--output", default=None, help="Write somewhere else instead of replacing the input")
+    return parser.parse_args()
 
 def main():
-    if not os.path.exists(INPUT_FILE):
-        print(f"❌ Error: {INPUT_FILE} not found.")
+    args = parse_args()
+    if not os.path.exists(args.input):
+        print(f"❌ Error: {args.input} not found.")
         return
 
-    print(f"📂 Loading {INPUT_FILE}...")
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        pokedex_data = json.load(f)
-
-    print(f"🧹 Cleaning move names for {len(pokedex_data)} Pokemon...")
-    
-    count_moves_fixed = 0
-
-    for p in pokedex_data:
-        # 1. Get the list of moves
-        raw_moves = p.get('moves', [])
-        
-        # 2. Replace hyphens with spaces
-        clean_moves = [move.replace('-', ' ') for move in raw_moves]
-        
-        # 3. Save it back
-        p['moves'] = clean_moves
-        count_moves_fixed += len(clean_moves)
-
-    # 4. Save the new file
-    print(f"💾 Saving to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(pokedex_data, f, indent=4)
-
-    print(f"✅ Done! Processed {count_moves_fixed} moves.")
-    print(f"👉 Please rename '{OUTPUT_FILE}' to '{INPUT_FILE}' to use it with your app.")
+    # Entries are streamed one at a time, so memory stays flat however big each entry gets
+    print(f"🧹 Cleaning {args.input} entry by entry...")
+    total, changed = transform_file(args.input, args.output)
+
+    print(f"✅ Done! {changed} of {total} entries changed, {total - changed} were already clean.")
+    if changed:
+        print(f"💾 Saved to {args.output or args.input}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
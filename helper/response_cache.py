@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+import time
+import zlib
+
+# CONFIGURATION
+CACHE_FILE = "./pokedex/http_cache.sqlite"
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache for the PokeAPI downloader, stored in one SQLite file.
+    - Keyed by URL. Bodies are stored zlib-compressed with their ETag / Last-Modified headers.
+    - `conditional_headers()` turns a cached entry into If-None-Match / If-Modified-Since,
+      so an unchanged resource comes back as a tiny 304 instead of the full payload.
+    - Keeps hit / miss counters and how many body bytes were NOT downloaded thanks to the cache.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        # One connection shared by all downloader threads, guarded by our own lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def get(self, url):
+        """Returns (body_bytes, etag, last_modified) or None if the URL was never cached."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]), row[1], row[2]
+
+    def put(self, url, body, etag=None, last_modified=None):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, zlib.compress(body), len(body), time.time()),
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Builds the revalidation headers for a cached entry."""
+        headers = {}
+        if entry:
+            _, etag, last_modified = entry
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def record_hit(self, body):
+        with self.lock:
+            self.hits += 1
+            self.bytes_saved += len(body)
+
+    def record_miss(self):
+        with self.lock:
+            self.misses += 1
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return (f"Cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+                f"{self.bytes_saved / 1024 / 1024:.1f} MB not re-downloaded")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
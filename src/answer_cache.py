@@ -0,0 +1,112 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# CONFIGURATION
+SIMILARITY_THRESHOLD = 0.92 # Cosine similarity of question embeddings that counts as "same question"
+TTL_SECONDS = 60 * 60 # Answers older than this are asked again
+MAX_ENTRIES = 500 # Least recently used answers are dropped past this
+
+def normalize_question(text):
+    """'Is Garchomp fast??' -> 'is garchomp fast'"""
+    return " ".join(re.sub(r"[^a-z0-9#<>=]+", " ", text.lower()).split())
+
+class CachedAnswer:
+    __slots__ = ("question", "answer", "vector", "signature", "created_at")
+
+    def __init__(self, question, answer, vector, signature):
+        self.question = question
+        self.answer = answer
+        self.vector = vector
+        self.signature = signature
+        self.created_at = time.monotonic()
+
+class AnswerCache:
+    """
+    Cache in front of the agent for repeated and reworded questions.
+    1. Exact: the normalized question text is a dict key.
+    2. Near-duplicate: cosine similarity of the question embedding against every cached
+       question (one matrix-vector product), accepted above `threshold` AND only if both
+       questions have the same signature (Pokemon, moves, numbers, types...), so
+       "is Garchomp fast?" never answers "is Gengar fast?".
+    Entries expire after `ttl` seconds, the least recently used go first past `max_entries`,
+    and everything is dropped when `version_fn()` changes (new pokedex or vector DB).
+    """
+
+    def __init__(self, embeddings, version_fn=lambda: None, signature_fn=lambda text: frozenset(),
+                 threshold=SIMILARITY_THRESHOLD, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES):
+        self.embeddings = embeddings
+        self.version_fn = version_fn
+        self.signature_fn = signature_fn
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # normalized question -> CachedAnswer
+        self.version = version_fn()
+        self.lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _embed(self, question):
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self):
+        version = self.version_fn()
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [k for k, e in self.entries.items() if now - e.created_at > self.ttl]:
+            del self.entries[key]
+
+    def get(self, question):
+        """Returns (answer, how) with how = 'exact' / 'similar', or (None, None) on a miss."""
+        key = normalize_question(question)
+        with self.lock:
+            self._check_version()
+            self._expire()
+            entry = self.entries.get(key)
+            if entry:
+                self.entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.answer, "exact"
+            signature = self.signature_fn(question)
+            candidates = [(k, e) for k, e in self.entries.items() if e.signature == signature]
+
+        if candidates:
+            vector = self._embed(question)
+            scores = np.stack([e.vector for _, e in candidates]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                with self.lock:
+                    best_key = candidates[best][0]
+                    if best_key in self.entries:
+                        self.entries.move_to_end(best_key)
+                        self.similar_hits += 1
+                        return candidates[best][1].answer, "similar"
+
+        with self.lock:
+            self.misses += 1
+        return None, None
+
+    def put(self, question, answer):
+        entry = CachedAnswer(question, answer, self._embed(question), self.signature_fn(question))
+        with self.lock:
+            self._check_version()
+            self.entries[normalize_question(question)] = entry
+            self.entries.move_to_end(normalize_question(question))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def summary(self):
+        total = self.exact_hits + self.similar_hits + self.misses
+        rate = (self.exact_hits + self.similar_hits) / total * 100 if total else 0.0
+        return (f"Answer cache: {self.exact_hits} exact + {self.similar_hits} similar hits, "
+                f"{self.misses} misses ({rate:.0f}% answered from cache)")
@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from langchain_core.callbacks import BaseCallbackHandler
+from tracing import TRACER
+
+# CONFIGURATION
+MAX_WORKERS = 8 # Questions in progress at once (retrieval, tools and waiting on the model)
+MAX_MODEL_CALLS = 4 # Chat model requests in flight at once, across all workers (match Ollama's OLLAMA_NUM_PARALLEL)
+QUESTION_FIELDS = ["question", "input", "prompt", "body"] # First one present in a JSONL record is the question
+ID_FIELDS = ["id", "request_id"]
+
+class ModelCallLimiter(BaseCallbackHandler):
+    """
+    Caps chat model calls across every worker with one shared semaphore, and times this run's calls.
+    LangChain runs sync callbacks on the calling thread right before / after the request,
+    so blocking in on_chat_model_start holds the call back until a slot is free.
+    One instance per question, all sharing the same semaphore.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.starts = {}
+        self.calls = 0
+        self.model_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.output_tokens = 0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        start = time.perf_counter()
+        self.slots.acquire()
+        self.wait_seconds += time.perf_counter() - start
+        self.starts[run_id] = time.perf_counter()
+
+    def _release(self, run_id):
+        start = self.starts.pop(run_id, None)
+        if start is not None:
+            self.slots.release()
+            self.calls += 1
+            self.model_seconds += time.perf_counter() - start
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._release(run_id)
+        for generation in response.generations[0] if response.generations else []:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            self.output_tokens += usage.get("output_tokens", 0)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._release(run_id)
+
+def read_questions(path, question_field=None):
+    """Streams (id, question) from a JSONL file. Records without an id get their line number ('line-12')."""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield f"line-{number}", record
+                continue
+            fields = [question_field] if question_field else QUESTION_FIELDS
+            question = next((record[field] for field in fields if record.get(field)), None)
+            if question is None:
+                raise ValueError(f"Line {number} of {path} has no {' / '.join(fields)} field")
+            record_id = next((record[field] for field in ID_FIELDS if record.get(field) is not None), f"line-{number}")
+            yield str(record_id), question
+
+def load_finished(path):
+    """
+    Ids already answered in an earlier (possibly interrupted) run. Failed ones are tried again.
+    A half-written last line, left by a run killed mid-write, is cut off so appends stay valid JSONL.
+    """
+    if not os.path.exists(path):
+        return set()
+    finished = set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    for line in data.decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("error") is None:
+            finished.add(record["id"])
+        else:
+            finished.discard(record["id"])
+    return finished
+
+class BatchStats:
+    """Throughput and latency numbers for one batch run."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.cached = 0
+        self.latencies = []
+        self.start = time.perf_counter()
+
+    def record(self, result):
+        self.done += 1
+        self.errors += result['error'] is not None
+        self.cached += result['cached']
+        self.latencies.append(result['seconds'])
+
+    def percentile(self, pct):
+        ordered = sorted(self.latencies)
+        return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))] if ordered else 0.0
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def progress_line(self):
+        eta = (self.total - self.done) / self.rate if self.rate > 0 else float("inf")
+        return (f"[{self.done}/{self.total}] {self.rate:.2f} questions/s, "
+                f"p50 {self.percentile(50):.2f}s p95 {self.percentile(95):.2f}s, ETA {eta:.0f}s")
+
+    def summary(self):
+        return (f"Answered {self.done} questions in {time.perf_counter() - self.start:.1f}s ({self.rate:.2f}/s), "
+                f"{self.errors} errors, {self.cached} from the answer cache, "
+                f"p50 {self.percentile(50):.2f}s, p95 {self.percentile(95):.2f}s")
+
+def answer_question(agent_executor, answer_cache, slots, question_id, question):
+    """Runs one question through the shared agent. Never raises: failures are recorded as `error`."""
+    limiter = ModelCallLimiter(slots)
+    start = time.perf_counter()
+    answer, error, cached = None, None, False
+    try:
+        with TRACER.span("request", question=question, batch_id=question_id):
+            if answer_cache is not None:
+                answer, _ = answer_cache.get(question)
+                cached = answer is not None
+            if answer is None:
+                config = {"callbacks": [limiter, *TRACER.callbacks()]}
+                answer = agent_executor.invoke({"input": question}, config=config)['output']
+                if answer_cache is not None:
+                    answer_cache.put(question, answer)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "id": question_id,
+        "question": question,
+        "answer": answer,
+        "error": error,
+        "cached": cached,
+        "seconds": round(time.perf_counter() - start, 3),
+        "model_calls": limiter.calls,
+        "model_seconds": round(limiter.model_seconds, 3),
+        "model_wait_seconds": round(limiter.wait_seconds, 3),
+        "output_tokens": limiter.output_tokens,
+        "thread": threading.current_thread().name,
+    }
+
+def write_finished(pending, out, stats):
+    """Waits for at least one answer, appends the finished ones to the output file. Returns what's still pending."""
+    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+    for future in finished:
+        result = future.result()
+        # Written on the main thread only, one flushed line per answer: an interruption loses nothing written
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        stats.record(result)
+        mark = "❌" if result['error'] else "⚡" if result['cached'] else "✅"
+        print(f"   {mark} {result['id']} ({result['seconds']:.2f}s)  {stats.progress_line()}")
+    return pending
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with the Pokemon Professor.")
+    parser.add_argument("input", help="JSONL file, one question per line ({\"id\": ..., \"question\": ...} or a plain string)")
+    parser.add_argument("--output", default=None, help="Answers JSONL (default: <input>.answers.jsonl), appended to and resumed from")
+    parser.add_argument("--question-field", default=None, help=f"Field holding the question (default: first of {', '.join(QUESTION_FIELDS)})")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Questions in progress at once")
+    parser.add_argument("--max-model-calls", type=int, default=MAX_MODEL_CALLS, help="Chat model requests in flight at once")
+    parser.add_argument("--fresh", action="store_true", help="Ignore earlier answers in the output file and start over")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Always run the agent, even for repeated questions")
+    parser.add_argument("--fake", action="store_true", help="Use deterministic fake models instead of Ollama")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    output = args.output or f"{os.path.splitext(args.input)[0]}.answers.jsonl"
+    if not os.path.exists(args.input):
+        print(f"❌ Error: {args.input} not found.")
+        return
+
+    # 1. What's left to do (a previous run may have been interrupted)
+    if args.fresh and os.path.exists(output):
+        os.remove(output)
+    finished = load_finished(output)
+    try:
+        # One quick pass over the ids, so a malformed line fails before any model is loaded
+        remaining = sum(1 for question_id, _ in read_questions(args.input, args.question_field) if question_id not in finished)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return
+    print(f"📂 {remaining} questions to answer from {args.input} ({len(finished)} already answered in {output}).")
+    if not remaining:
+        print("✅ Nothing left to do.")
+        return
+
+    # 2. Load the Professor once; every worker shares its indexes, vector DB and models
+    if args.fake:
+        os.environ["POKEDEX_FAKE_MODELS"] = "1"
+    import chat
+    chat.wait_until_ready()
+    chat.retriever.verbose = False # The progress lines are the output here
+    chat.self_query_retriever.verbose = False
+    llm = chat.make_chat_model()
+    llm.tags = ["agent"]
+    agent_executor = chat.build_agent_executor(llm, verbose=False)
+    answer_cache = None if args.no_answer_cache else chat.ANSWER_CACHE
+    slots = threading.BoundedSemaphore(max(1, args.max_model_calls))
+
+    # 3. Stream the questions through the pool, never holding more than 2 x workers at once
+    print(f"🤖 Answering with {args.workers} workers, at most {args.max_model_calls} model calls at once...")
+    stats = BatchStats(remaining)
+    questions = ((qid, q) for qid, q in read_questions(args.input, args.question_field) if qid not in finished)
+    pending = set()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="batch") as pool, \
+            open(output, "a", encoding="utf-8") as out:
+        try:
+            for question_id, question in questions:
+                pending.add(pool.submit(answer_question, agent_executor, answer_cache, slots, question_id, question))
+                if len(pending) >= 2 * args.workers:
+                    pending = write_finished(pending, out, stats)
+            while pending:
+                pending = write_finished(pending, out, stats)
+        except KeyboardInterrupt:
+            # Queued questions are dropped (the next run picks them up), running ones are still saved
+            running = {future for future in pending if not future.cancel()}
+            print(f"\n⏹️ Interrupted, saving the {len(running)} answers in progress (Ctrl+C again to abort)...")
+            while running:
+                running = write_finished(running, out, stats)
+            print(f"💾 {stats.done} answers saved to {output}, run the same command again to resume.")
+            return
+
+    print(f"\n✅ {stats.summary()}")
+    print(f"💾 Saved to {output}")
+    if TRACER.enabled:
+        print(f"💾 {TRACER.export()} spans saved to {chat.TRACE_FILE}")
+
+if __name__ == "__main__":
+    main()
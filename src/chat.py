@@ -1,122 +1,323 @@
-import json
-from langchain_chroma import Chroma
-from langchain_ollama import ChatOllama, OllamaEmbeddings
-from langchain_classic.agents import create_tool_calling_agent, AgentExecutor
-from langchain.tools import tool
-from langchain_classic.tools.retriever import create_retriever_tool
+import os
+import re
+from langchain_core.tools import tool # Same decorator as langchain.tools, without importing all of langchain
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 
-# NEW IMPORTS FOR SELF-QUERY
-from langchain_classic.chains.query_constructor.schema import AttributeInfo 
-from langchain_classic.retrievers.self_query.base import SelfQueryRetriever
+# The heavy imports (Chroma, Ollama, the agent and SelfQuery modules) take seconds,
+# so they happen inside the loading stages below, in the background.
+
+from startup import Startup
+from tracing import TRACE_FILE, TRACER
+from embedding_cache import CachedEmbeddings
+from answer_cache import AnswerCache, normalize_question
+from structured_query import AMBIGUOUS_WORDS, FastPathRetriever, StructuredQueryParser
+from stat_index import StatIndex, parse_conditions, value_key
+from move_index import MoveIndex
+from name_index import NameResolver
+from pokedex_store import load_pokedex, source_signature
+from keyword_index import INDEX_FILE_NAME, KeywordIndex
+from filter_index import FilterIndex
+from evolution_index import EvolutionIndex, describe_edge
+from fake_models import FAKE_EMBEDDING_MODEL, FakeProfessorModel, fake_embeddings
 
 # --- CONFIGURATION ---
-DB_DIRECTORY = "./pokedex_db"
+DB_DIRECTORY = os.environ.get("POKEDEX_DB", "./pokedex_db")
 JSON_FILE = "./pokedex/pokedex.json"
+BIN_FILE = "./pokedex/pokedex.bin" # Compiled from JSON_FILE automatically when missing or stale
+EVOLUTION_FILE = "./pokedex/evolution_graph.json" # Written by helper/download_pokedex.py
+COLLECTION_NAME = "pokedex_collection" # Must match helper/create_db.py
 MODEL_NAME = "llama3.1" # Strongly recommended for Self-Query logic
+EMBEDDING_MODEL = "nomic-embed-text"
+# POKEDEX_FAKE_MODELS=1 swaps Ollama for deterministic fake chat / embedding models (tests, benchmarks).
+# Pair it with a DB built by `create_db.py --fake-embeddings` via POKEDEX_DB.
+FAKE_MODELS = os.environ.get("POKEDEX_FAKE_MODELS") == "1"
+# POKEDEX_STARTUP=background loads everything in parallel while the prompt is already up,
+# POKEDEX_STARTUP=lazy only loads a resource when something first needs it.
+STARTUP_MODE = os.environ.get("POKEDEX_STARTUP", "background")
+# Send a tiny request to the chat and embedding models while loading, so Ollama has them
+# in memory before the first question instead of cold-loading them during it.
+WARMUP = os.environ.get("POKEDEX_WARMUP", "1") == "1"
+MAX_STAT_ROWS = 50 # Most rows stat_query_tool shows, whatever limit the agent asks for
+MAX_LISTED_NAMES = 50 # Most names find_move_learners_tool lists
+
+def make_chat_model():
+    if FAKE_MODELS:
+        return FakeProfessorModel()
+    from langchain_ollama import ChatOllama
+    return ChatOllama(model=MODEL_NAME, temperature=0)
 
 # --- 1. LOAD RESOURCES ---
+# Every stage below becomes a module-level name (db, POKEDEX_DATA, STAT_INDEX...) once it has run.
+# Stages only wait for the stages they need, so e.g. Chroma opens while the indexes are built.
 
-print("⏳ Loading Vector Database...")
-embedding_function = OllamaEmbeddings(model="nomic-embed-text")
-db = Chroma(persist_directory=DB_DIRECTORY, embedding_function=embedding_function)
+STARTUP = Startup(globals(), lazy=STARTUP_MODE == "lazy")
 
-print("⏳ Loading Raw Pokedex (for Move Lookups)...")
-with open(JSON_FILE, "r", encoding="utf-8") as f:
-    POKEDEX_DATA = json.load(f)
-POKEDEX_LOOKUP = {p['name'].lower(): p for p in POKEDEX_DATA}
+@STARTUP.stage("embedding_function")
+def load_embeddings():
+    # Repeated questions are embedded once, then served from the on-disk cache
+    if FAKE_MODELS:
+        return CachedEmbeddings(fake_embeddings(), FAKE_EMBEDDING_MODEL)
+    from langchain_ollama import OllamaEmbeddings
+    return CachedEmbeddings(OllamaEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL)
 
-# --- 2. DEFINE THE SELF-QUERY RETRIEVER ---
+@STARTUP.stage("db", after=["embedding_function"])
+def load_vector_db(embedding_function):
+    from langchain_chroma import Chroma
+    db = Chroma(persist_directory=DB_DIRECTORY, embedding_function=embedding_function, collection_name=COLLECTION_NAME)
+    # Every search (fast path or SelfQuery) and every question embedding shows up as a span
+    TRACER.instrument(embedding_function, "embed_query", "embed.query")
+    return TRACER.instrument(db, "similarity_search", "chroma.search")
+
+@STARTUP.stage("POKEDEX_DATA")
+def load_raw_pokedex():
+    # Memory-mapped, entries are only decoded field by field when something reads them
+    return load_pokedex(JSON_FILE, BIN_FILE)
+
+@STARTUP.stage("POKEDEX_LOOKUP", after=["POKEDEX_DATA"])
+def build_pokedex_lookup(pokedex_data):
+    return {p['name'].lower(): p for p in pokedex_data}
+
+# BM25 over the same search_content the vector DB embeds, saved by create_db.py next to chroma.sqlite3.
+# Rebuilt in memory if it's missing or was built from another pokedex.json.
+@STARTUP.stage("KEYWORD_INDEX", after=["POKEDEX_DATA"])
+def load_keyword_index(pokedex_data):
+    source = list(source_signature(JSON_FILE))
+    index = KeywordIndex.load(os.path.join(DB_DIRECTORY, INDEX_FILE_NAME), source)
+    if index is None:
+        print(f"⚠️ No up to date keyword index in {DB_DIRECTORY}, building it in memory (run create_db.py to save it).")
+        index = KeywordIndex.build((p['id'], p['search_content']) for p in pokedex_data)
+    return index
+
+@STARTUP.stage("STAT_INDEX", after=["POKEDEX_DATA"])
+def build_stat_index(pokedex_data):
+    return StatIndex(pokedex_data)
+
+@STARTUP.stage("MOVE_INDEX", after=["POKEDEX_DATA"])
+def build_move_index(pokedex_data):
+    return MoveIndex(pokedex_data)
 
-print("🧠 Configuring Metadata Filters...")
+# Evolution edges as adjacency lists with every family line precomputed.
+# A pokedex.json from before the graph file existed still works: the edges are read back from evolution_info.
+@STARTUP.stage("EVOLUTION_INDEX", after=["POKEDEX_DATA"])
+def build_evolution_index(pokedex_data):
+    return EvolutionIndex.load(EVOLUTION_FILE) or EvolutionIndex.from_pokedex(pokedex_data)
+
+@STARTUP.stage("NAME_RESOLVER", after=["POKEDEX_DATA", "MOVE_INDEX"])
+def build_name_resolver(pokedex_data, move_index):
+    return NameResolver(pokedex_data, move_index.move_names)
+
+# Repeated and reworded questions are answered from memory instead of running the agent again.
+# Two questions only share an answer if they name the same Pokemon, moves, numbers, types...
+@STARTUP.stage("SIGNATURE_WORDS", after=["STAT_INDEX"])
+def build_signature_words(stat_index):
+    return AMBIGUOUS_WORDS | {value_key(v) for v in [*stat_index.types, *stat_index.colors, *stat_index.shapes]}
+
+def question_signature(question):
+    words = set(normalize_question(question).split())
+    numbers = re.findall(r"\d+|[<>=]+", question)
+    return frozenset(NAME_RESOLVER.mentions(question)) | (words & SIGNATURE_WORDS) | frozenset(numbers)
+
+def data_version():
+    """Changes whenever the pokedex or the vector DB is rebuilt, which empties the answer cache."""
+    version = []
+    for path in [JSON_FILE, os.path.join(DB_DIRECTORY, "chroma.sqlite3")]:
+        try:
+            stat = os.stat(path)
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+@STARTUP.stage("ANSWER_CACHE", after=["embedding_function", "NAME_RESOLVER", "SIGNATURE_WORDS"])
+def build_answer_cache(embedding_function, *signature_resources):
+    return AnswerCache(embedding_function, data_version, question_signature)
+
+# --- 2. DEFINE THE SELF-QUERY RETRIEVER ---
 
 # A. Initialize the LLM specifically for the Retriever
 # We use temperature=0 because logic/math filters need to be exact, not creative.
-llm_retriever = ChatOllama(model=MODEL_NAME, temperature=0)
+@STARTUP.stage("llm_retriever")
+def load_retriever_llm():
+    return make_chat_model()
 
 # B. Define the Metadata Schema
 # This tells the LLM what fields are available in the database to filter by.
-metadata_field_info = [
-    AttributeInfo(
-        name="name",
-        description="The name of the Pokemon",
-        type="string",
-    ),
-    AttributeInfo(
-        name="id",
-        description="The unique identifier for the Pokemon",
-        type="integer",
-    ),
-    AttributeInfo(
-        name="type",
-        description="The primary elemental type of the Pokemon (e.g. Fire, Water, Grass)",
-        type="string",
-    ),
-    AttributeInfo(
-        name="color",
-        description="The primary color of the Pokemon (e.g. Red, Blue, Green)",
-        type="string",
-    ),
-    AttributeInfo(
-        name="shape",
-        description="The shape of the Pokemon (e.g. Quadruped, Bipedal, etc.)",
-        type="string",
-    ),
-    AttributeInfo(
-        name="ability",
-        description="The primary ability of the Pokemon (e.g. Overgrow, Blaze)",
-        type="string",
-    ),
-    AttributeInfo(
-        name="hp",
-        description="The base HP stat",
-        type="integer",
-    ),
-    AttributeInfo(
-        name="attack",
-        description="The base Attack stat",
-        type="integer",
-    ),
-    AttributeInfo(
-        name="defense",
-        description="The base Defense stat",
-        type="integer",
-    ),
-    AttributeInfo(
-        name="speed",
-        description="The base Speed stat",
-        type="integer",
-    ),
-    AttributeInfo(
-        name="special_attack",
-        description="The base Special Attack stat",
-        type="integer",
-    ),
-    AttributeInfo(
-        name="special_defense",
-        description="The base Special Defense stat",
-        type="integer",
-    )
-]
+# Only the fields the collection actually stores are offered: a DB built before generation, types,
+# abilities and total existed would otherwise get filters that match nothing.
+@STARTUP.stage("metadata_field_info", after=["FILTER_INDEX"])
+def build_metadata_field_info(filter_index):
+    from langchain_classic.chains.query_constructor.schema import AttributeInfo
+    fields = [
+        AttributeInfo(
+            name="name",
+            description="The name of the Pokemon",
+            type="string",
+        ),
+        AttributeInfo(
+            name="id",
+            description="The unique identifier for the Pokemon",
+            type="integer",
+        ),
+        AttributeInfo(
+            name="generation",
+            description="The generation the Pokemon was introduced in, from 1 to 9",
+            type="integer",
+        ),
+        AttributeInfo(
+            name="type",
+            description="The primary elemental type of the Pokemon (e.g. Fire, Water, Grass)",
+            type="string",
+        ),
+        AttributeInfo(
+            name="secondary_type",
+            description="The second type of a dual-type Pokemon, 'none' for single-type Pokemon",
+            type="string",
+        ),
+        AttributeInfo(
+            name="types",
+            description="ALL types of the Pokemon (e.g. ['fire', 'flying']). Use contain to match a type in any slot",
+            type="list[string]",
+        ),
+        AttributeInfo(
+            name="color",
+            description="The primary color of the Pokemon (e.g. Red, Blue, Green)",
+            type="string",
+        ),
+        AttributeInfo(
+            name="shape",
+            description="The shape of the Pokemon (e.g. Quadruped, Bipedal, etc.)",
+            type="string",
+        ),
+        AttributeInfo(
+            name="ability",
+            description="The primary ability of the Pokemon (e.g. Overgrow, Blaze)",
+            type="string",
+        ),
+        AttributeInfo(
+            name="abilities",
+            description="ALL abilities of the Pokemon, hidden ones included. Use contain to match any of them",
+            type="list[string]",
+        ),
+        AttributeInfo(
+            name="hp",
+            description="The base HP stat",
+            type="integer",
+        ),
+        AttributeInfo(
+            name="attack",
+            description="The base Attack stat",
+            type="integer",
+        ),
+        AttributeInfo(
+            name="defense",
+            description="The base Defense stat",
+            type="integer",
+        ),
+        AttributeInfo(
+            name="speed",
+            description="The base Speed stat",
+            type="integer",
+        ),
+        AttributeInfo(
+            name="special_attack",
+            description="The base Special Attack stat",
+            type="integer",
+        ),
+        AttributeInfo(
+            name="special_defense",
+            description="The base Special Defense stat",
+            type="integer",
+        ),
+        AttributeInfo(
+            name="total",
+            description="The base stat total (sum of the six base stats)",
+            type="integer",
+        )
+    ]
+    if not len(filter_index):
+        return fields # Empty DB, nothing to check against (and nothing to find either)
+    return [info for info in fields if filter_index.has_field(info.name)]
 
 # C. Create the Smart Retriever
 # This replaces db.as_retriever()
-retriever = SelfQueryRetriever.from_llm(
-    llm_retriever,
-    db,
-    "Brief summary of Pokemon stats, lore, and evolutions", # Description of the document content
-    metadata_field_info,
-    verbose=True # Set to True so you can see the filter being constructed in the console
-)
+@STARTUP.stage("self_query_retriever", after=["llm_retriever", "db", "metadata_field_info"])
+def build_self_query_retriever(llm_retriever, db, metadata_field_info):
+    from langchain_classic.retrievers.self_query.base import SelfQueryRetriever
+    from langchain_community.query_constructors.chroma import ChromaTranslator
+    from langchain_core.structured_query import Comparator
+
+    # The stock Chroma translator has no `contain`, which the list fields (types, abilities) need
+    class ListChromaTranslator(ChromaTranslator):
+        allowed_comparators = [*ChromaTranslator.allowed_comparators, Comparator.CONTAIN]
+
+        def _format_func(self, func):
+            return "$contains" if func == Comparator.CONTAIN else super()._format_func(func)
+
+    return SelfQueryRetriever.from_llm(
+        llm_retriever,
+        db,
+        "Brief summary of Pokemon stats, lore, and evolutions", # Description of the document content
+        metadata_field_info,
+        structured_query_translator=ListChromaTranslator(),
+        verbose=True # Set to True so you can see the filter being constructed in the console
+    )
+
+# D. Pre-narrow filtered searches in memory
+# Every filtered search (fast path or SelfQuery) is evaluated against the metadata columns first and
+# only the qualifying entries are scored, so "dual Fire/Flying types" touches a handful of vectors.
+@STARTUP.stage("FILTER_INDEX", after=["db"])
+def build_filter_index(db):
+    filter_index = FilterIndex.from_vectorstore(db)
+    if len(filter_index):
+        filter_index.install(db) # An empty DB keeps plain Chroma search
+    return filter_index
+
+# E. Put a rule-based parser in front of it
+# Questions like "fire types with speed > 100" are turned into a filter directly,
+# the LLM query constructor is only used when the rules can't read the question.
+# F. And fuse keyword (BM25) hits with the vector results, so exact names aren't missed
+@STARTUP.stage("retriever", after=["db", "self_query_retriever", "POKEDEX_DATA", "KEYWORD_INDEX", "FILTER_INDEX"])
+def build_retriever(db, self_query_retriever, pokedex_data, keyword_index, filter_index):
+    return FastPathRetriever(
+        vectorstore=db,
+        fallback=self_query_retriever,
+        # A DB built before the full type / ability sets were stored only gets primary-slot filters
+        parser=StructuredQueryParser(pokedex_data, multi_valued=filter_index.has_field("types")),
+        keyword_index=keyword_index,
+        verbose=True
+    )
 
 # --- 3. DEFINE TOOLS ---
 
+# Every tool waits for (in lazy mode: loads) only the stages it reads, when it is first called,
+# so e.g. a stat question never opens the vector DB.
+
 # TOOL A: The Smart Vector Search
-tool_search = create_retriever_tool(
-    retriever,
-    "search_pokedex_context",
-    "ALWAYS USE THIS FIRST. Searches for Pokemon descriptions, stats, types. Can filter by stats (e.g. Speed > 100)."
-)
+# Same as create_retriever_tool(retriever, ...), but the retriever is only needed once the tool runs
+@tool("search_pokedex_context")
+def tool_search(query: str, config: RunnableConfig):
+    """ALWAYS USE THIS FIRST. Searches for Pokemon descriptions, stats, types. Can filter by stats (e.g. Speed > 100)."""
+    STARTUP.wait("retriever")
+    return "\n\n".join(doc.page_content for doc in retriever.invoke(query, config=config))
+
+# Typos, hyphens and variant names ("charizzard", "solar-beam", "Mr Mime") are resolved here,
+# so the agent doesn't have to retry with another spelling.
+def resolve_pokemon(pokemon_name):
+    """Returns (row, display name, note) or (None, None, error message)."""
+    match = NAME_RESOLVER.resolve_pokemon(pokemon_name)
+    if match is None:
+        return None, None, f"Error: Pokemon '{pokemon_name}' not found in raw database."
+    note = "" if match.exact else f" (interpreted '{pokemon_name}' as {match.value}, confidence {match.score})"
+    return MOVE_INDEX.row(match.value), match.value, note
+
+def resolve_move(move_name):
+    """Returns (move id, display name, note). The id is None if no Pokemon learns anything like it."""
+    match = NAME_RESOLVER.resolve_move(move_name)
+    if match is None:
+        return None, move_name, ""
+    note = "" if match.exact else f" (interpreted '{move_name}' as {match.value}, confidence {match.score})"
+    return MOVE_INDEX.move_id(match.value), match.value, note
 
 # TOOL B: The Move Checker
 @tool
@@ -125,52 +326,253 @@ def check_move_tool(pokemon_name: str, move_name: str):
     Checks if a Pokemon can learn a specific move. 
     Input: pokemon_name (e.g. 'Charizard'), move_name (e.g. 'Solar Beam').
     """
-    p_name = pokemon_name.lower().strip()
-    m_name = move_name.lower().strip()
-    
-    if p_name not in POKEDEX_LOOKUP:
+    STARTUP.wait_for("NAME_RESOLVER", "MOVE_INDEX")
+    row, pokemon, pokemon_note = resolve_pokemon(pokemon_name)
+    if row is None:
+        return pokemon_note
+
+    move_id, move, move_note = resolve_move(move_name)
+    if move_id is None:
+        return f"Error: No Pokemon learns a move called '{move_name}'."
+    if MOVE_INDEX.learns(row, move_id):
+        return f"✅ Yes! {pokemon} is able to learn {move}.{pokemon_note}{move_note}"
+    else:
+        return f"❌ No. {pokemon} cannot learn {move}.{pokemon_note}{move_note}"
+
+# TOOL B2: Many Pokemon x many moves in one call
+@tool
+def check_moves_tool(pokemon_names: list[str], move_names: list[str]):
+    """
+    Checks several Pokemon against several moves at once (every pair).
+    Input: pokemon_names (e.g. ['Charizard', 'Blastoise']), move_names (e.g. ['Earthquake', 'Ice Beam']).
+    """
+    STARTUP.wait_for("NAME_RESOLVER", "MOVE_INDEX")
+    moves = [resolve_move(move_name) for move_name in move_names]
+    # Unknown moves (typos, made-up names) are reported once, not answered with a confident "cannot learn"
+    lines = [f"Error: No Pokemon learns a move called '{move}'." for move_id, move, _ in moves if move_id is None]
+    moves = [move for move in moves if move[0] is not None]
+    for pokemon_name in pokemon_names:
+        row, pokemon, pokemon_note = resolve_pokemon(pokemon_name)
+        if row is None:
+            lines.append(pokemon_note)
+            continue
+        for move_id, move, move_note in moves:
+            if MOVE_INDEX.learns(row, move_id):
+                lines.append(f"✅ {pokemon} can learn {move}.{pokemon_note}{move_note}")
+            else:
+                lines.append(f"❌ {pokemon} cannot learn {move}.{pokemon_note}{move_note}")
+    return "\n".join(lines)
+
+# TOOL B3: Who learns these moves?
+@tool
+def find_move_learners_tool(all_of: list[str], any_of: list[str] | None = None, none_of: list[str] | None = None, limit: int = 50):
+    """
+    Finds every Pokemon that learns ALL moves in all_of, at least ONE of any_of, and NONE of none_of.
+    Use it for questions like 'who learns both Earthquake and Ice Beam'.
+    Input: all_of (e.g. ['Earthquake', 'Ice Beam']), any_of (optional), none_of (optional), limit (names to list, 1 to 50).
+    """
+    STARTUP.wait_for("NAME_RESOLVER", "MOVE_INDEX")
+    any_of = any_of or []
+    none_of = none_of or []
+    if not all_of and not any_of:
+        return "Error: Give at least one move in all_of or any_of."
+    limit = min(max(1, int(limit)), MAX_LISTED_NAMES)
+    resolved = {}
+    notes = ""
+    for move_name in [*all_of, *any_of, *none_of]:
+        move_id, _, move_note = resolve_move(move_name)
+        if move_id is None:
+            return f"Error: No Pokemon learns a move called '{move_name}'."
+        resolved[move_name] = move_id
+        notes += move_note
+
+    bits = MOVE_INDEX.learner_bits(
+        [resolved[m] for m in all_of], [resolved[m] for m in any_of], [resolved[m] for m in none_of]
+    )
+    rows = MOVE_INDEX.rows_of(bits)
+    if not rows:
+        return f"No Pokemon match those move requirements.{notes}"
+    names = [MOVE_INDEX.names[row] for row in rows]
+    shown = ", ".join(names[:limit])
+    more = f" (and {len(names) - limit} more)" if len(names) > limit else ""
+    return f"{len(names)} Pokemon match: {shown}{more}.{notes}"
+
+# TOOL C: The Stat Table
+@tool
+def stat_query_tool(conditions: str = "", sort_by: str = "", descending: bool = True, limit: int = 10):
+    """
+    Exact filters and rankings over the stats of EVERY Pokemon (not just a few search results).
+    Use it for questions like 'fastest Water types' or 'attack > 120 and defense < 60'.
+    Input: conditions (e.g. 'type=water, speed>100'; fields: hp, attack, defense, special_attack,
+    special_defense, speed, total, id, type, ability, color, shape; operators: = != > >= < <=),
+    sort_by (a stat to rank by, e.g. 'speed'), descending (True = highest first), limit (rows to show, 1 to 50).
+    """
+    STARTUP.wait("STAT_INDEX")
+    limit = min(max(1, int(limit)), MAX_STAT_ROWS)
+    try:
+        total, rows = STAT_INDEX.query(parse_conditions(conditions), sort_by or None, descending, limit)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    if total == 0:
+        return f"No Pokemon match '{conditions}'."
+    order = f", sorted by {sort_by} ({'highest' if descending else 'lowest'} first)" if sort_by else ""
+    lines = [f"{total} Pokemon match '{conditions or 'everything'}'{order}. Showing {len(rows)}:"]
+    lines += [f"{i}. {STAT_INDEX.describe(row)}" for i, row in enumerate(rows, start=1)]
+    return "\n".join(lines)
+
+# TOOL D: The Evolution Graph
+@tool
+def evolution_tool(pokemon_name: str = "", question: str = "chain", condition: str = ""):
+    """
+    Answers evolution questions straight from the evolution graph, no search needed.
+    Input: pokemon_name (e.g. 'Eevee'), question ('chain' = its whole evolution family, 'next' = what it
+    evolves into, 'previous' = what it evolves from), condition (optional filter, e.g. 'water stone', 'trade', 'friendship').
+    Leave pokemon_name empty to list every evolution matching the condition (e.g. condition='metal coat').
+    """
+    STARTUP.wait_for("EVOLUTION_INDEX", "NAME_RESOLVER", "POKEDEX_LOOKUP")
+    if not pokemon_name.strip():
+        if not condition.strip():
+            return "Error: Give a pokemon_name, a condition, or both."
+        edges = EVOLUTION_INDEX.matching(condition)
+        if not edges:
+            return f"No evolution happens via '{condition}'."
+        return f"{len(edges)} evolutions via '{condition}':\n" + "\n".join(map(describe_edge, edges))
+
+    # Resolved against the whole Pokedex first, so a Pokemon that doesn't evolve is never read as one that does
+    match = NAME_RESOLVER.resolve_pokemon(pokemon_name)
+    if match is None:
         return f"Error: Pokemon '{pokemon_name}' not found in raw database."
-    
-    pokemon = POKEDEX_LOOKUP[p_name]
-    known_moves = set(pokemon['moves'])
+    note = "" if match.exact else f" (interpreted '{pokemon_name}' as {match.value}, confidence {match.score})"
+    species = EVOLUTION_INDEX.lookup(match.value, POKEDEX_LOOKUP[match.value.lower()]['variants'])
+    if species is None:
+        return f"{match.value} does not evolve and does not evolve from anything.{note}"
 
-    if m_name in known_moves:
-        return f"✅ Yes! {pokemon_name} is able to learn {move_name}."
+    question = question.strip().lower()
+    if question == "previous":
+        edges = EVOLUTION_INDEX.previous(species)
+        if not edges:
+            return f"{species} is the first stage of its line and does not evolve from anything.{note}"
+    elif question == "next" or condition:
+        edges = EVOLUTION_INDEX.next(species, condition)
+        if not edges:
+            how = f" via '{condition}'" if condition else ""
+            return f"{species} does not evolve into anything{how}.{note}"
     else:
-        return f"❌ No. {pokemon_name} cannot learn {move_name}."
+        return f"Evolution line of {species}:{note}\n{EVOLUTION_INDEX.chain(species)}"
+    return "\n".join(map(describe_edge, edges)) + note
 
-tools = [tool_search, check_move_tool]
+@STARTUP.stage("tools")
+def build_tools():
+    return [tool_search, check_move_tool, check_moves_tool, find_move_learners_tool, stat_query_tool, evolution_tool]
 
 # --- 4. SETUP THE AGENT ---
 
-print(f"🤖 Initializing Main Agent with {MODEL_NAME}...")
-llm_agent = ChatOllama(model=MODEL_NAME, temperature=0)
+@STARTUP.stage("llm_agent")
+def load_agent_llm():
+    llm = make_chat_model()
+    llm.tags = ["agent"] # Traced as 'llm.agent', apart from the SelfQuery LLM's calls
+    return llm
 
 prompt = ChatPromptTemplate.from_messages([
     ("system", """You are a Pokemon Professor, which means you ONLY answer questions about Pokemon.  
     1. ALWAYS use the 'search_pokedex_context' tool first to identify the Pokemon.
     2. If the user asks about stats (e.g. 'Who is faster than 100?'), the search tool handles the filtering automatically.
     3. If the user asks if a Pokemon can learn a specific move, YOU MUST use the 'check_move_tool'.
+       For several Pokemon or moves at once use 'check_moves_tool', and to find which Pokemon learn a set of moves use 'find_move_learners_tool'.
+    4. For exact stat filters or rankings (e.g. 'fastest Water types', 'attack > 120 and defense < 60'), use the 'stat_query_tool'.
+    5. For evolution questions (what a Pokemon evolves into or from, how, its full line, or which Pokemon evolve with an item), use the 'evolution_tool'.
     """),
+    ("placeholder", "{chat_history}"), # Earlier turns of this conversation (used by the server)
     ("human", "{input}"),
     ("placeholder", "{agent_scratchpad}"),
 ])
 
-agent = create_tool_calling_agent(llm_agent, tools, prompt)
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+def build_agent_executor(llm, verbose=True):
+    """One AgentExecutor over the shared tools. The server builds its own with verbose=False."""
+    from langchain_classic.agents import create_tool_calling_agent, AgentExecutor
+    tools = STARTUP.wait("tools")
+    agent = create_tool_calling_agent(llm, tools, prompt)
+    return AgentExecutor(agent=agent, tools=tools, verbose=verbose)
 
-# --- 5. START CHAT LOOP ---
+@STARTUP.stage("agent_executor", after=["llm_agent", "tools"])
+def build_main_agent(llm_agent, tools):
+    return build_agent_executor(llm_agent)
 
-print("\n🔵 Pokemon Professor Ready! (Type 'quit' to exit)")
-print("------------------------------------------------")
+# --- 5. WARM-UP ---
+# Ollama loads a model into memory on its first request, which can take longer than the answer itself.
+# Only in background mode: lazy mode is for when you don't want anything loaded up front.
 
-while True:
-    user_input = input("\nYou: ")
-    if user_input.lower() in ["quit", "exit"]:
-        break
-    
-    try:
-        response = agent_executor.invoke({"input": user_input})
-        print(f"\nProfessor: {response['output']}")
-    except Exception as e:
-        print(f"\n❌ Error: {e}")
\ No newline at end of file
+if WARMUP and not FAKE_MODELS:
+    @STARTUP.stage("warmup_chat_model", warmup=True)
+    def warm_up_chat_model():
+        return make_chat_model().invoke("Reply with OK.")
+
+    @STARTUP.stage("warmup_embeddings", after=["embedding_function"], warmup=True)
+    def warm_up_embeddings(embedding_function):
+        # Straight to the model: a cache hit wouldn't load anything
+        return embedding_function.embeddings.embed_query("warm up")
+
+def __getattr__(name):
+    # `chat.db`, `chat.retriever`... from other modules wait for that stage (and load it in lazy mode)
+    return STARTUP.wait(name)
+
+def wait_until_ready():
+    """Blocks until everything is loaded, prints the per-stage timings the first time."""
+    if not STARTUP.ready.is_set():
+        STARTUP.wait_until_ready()
+        print(STARTUP.report())
+
+STARTUP.start()
+
+# --- 6. START CHAT LOOP ---
+
+def ask(question):
+    """Answers one standalone question, from the answer cache when it has been asked (or reworded) before."""
+    # Only waits for what this question needs: a cache hit never waits for the agent, the agent's
+    # tools wait for their own indexes, so in lazy mode the rest is never loaded at all
+    STARTUP.wait("ANSWER_CACHE")
+    with TRACER.span("request", question=question) as request:
+        with TRACER.span("answer_cache.get"):
+            answer, how = ANSWER_CACHE.get(question)
+        if answer is not None:
+            print(f"⚡ Answered from cache ({how} match)")
+        else:
+            STARTUP.wait("agent_executor")
+            answer = agent_executor.invoke({"input": question}, config={"callbacks": TRACER.callbacks()})['output']
+            ANSWER_CACHE.put(question, answer)
+    if request is not None:
+        print(TRACER.request_summary(request))
+    return answer
+
+def main():
+    # The prompt comes up right away, loading carries on while the first question is typed
+    print("\n🔵 Pokemon Professor Ready! (Type 'quit' to exit)")
+    if STARTUP_MODE != "lazy":
+        print("⏳ Still loading the Pokedex and models in the background, ask away.")
+    print("------------------------------------------------")
+
+    while True:
+        user_input = input("\nYou: ")
+        if user_input.lower() in ["quit", "exit"]:
+            # Only what was loaded: in lazy mode the retriever may never have been needed
+            loaded = {name for name, state in STARTUP.status().items() if state == "done"}
+            if "embedding_function" in loaded:
+                print(f"📊 {embedding_function.summary()}")
+            if "retriever" in loaded:
+                print(f"📊 Search: {retriever.fast_path_hits} fast path, {retriever.fallbacks} LLM query constructor")
+            if "ANSWER_CACHE" in loaded:
+                print(f"📊 {ANSWER_CACHE.summary()}")
+            print(STARTUP.report())
+            if TRACER.enabled:
+                print(f"📊 {TRACER.summary()}")
+                print(f"💾 {TRACER.export()} spans saved to {TRACE_FILE} (open in chrome://tracing or ui.perfetto.dev)")
+            break
+
+        try:
+            print(f"\nProfessor: {ask(user_input)}")
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+
+if __name__ == "__main__":
+    main()
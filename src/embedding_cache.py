@@ -0,0 +1,130 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# CONFIGURATION
+CACHE_FILE = "./pokedex/embedding_cache.sqlite"
+MAX_ENTRIES = 20000 # ~60MB of 768-dim float32 vectors, least recently used entries are evicted past this
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain embedding model with a persistent SQLite cache.
+    - Keyed by (model name, sha256 of the text), vectors stored as float32 blobs.
+    - Only texts missing from the cache are sent to the real model, in one call.
+    - Capped at `max_entries`, the least recently used vectors are evicted first.
+    - Used by both create_db.py (documents) and chat.py (user queries).
+      OllamaEmbeddings embeds queries and documents the same way, so they share entries.
+    """
+
+    def __init__(self, embeddings, model_name, path=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        # Shared by the ingest worker threads, guarded by our own lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)")
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, hashes):
+        """Returns {hash: vector} for every hash already cached, and marks them as recently used."""
+        found = {}
+        with self.lock:
+            for start in range(0, len(hashes), 500): # Stay under SQLite's variable limit
+                chunk = hashes[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                    (self.model_name, *chunk),
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, self.model_name, h) for h in found],
+                )
+                self.conn.commit()
+        return found
+
+    def _store(self, vectors_by_hash):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                [(self.model_name, h, np.asarray(v, dtype=np.float32).tobytes(), now)
+                 for h, v in vectors_by_hash.items()],
+            )
+            # LRU eviction: drop the oldest entries once we are over the cap
+            count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self.conn.commit()
+
+    def embed_documents(self, texts):
+        hashes = [text_hash(t) for t in texts]
+        cached = self._lookup(list(set(hashes)))
+
+        # Embed each missing text once, even if it appears several times in the batch
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, t)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self._store(fresh)
+            cached.update(fresh)
+
+        with self.lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text):
+        h = text_hash(text)
+        cached = self._lookup([h])
+        if h in cached:
+            with self.lock:
+                self.hits += 1
+            return cached[h]
+
+        vector = self.embeddings.embed_query(text)
+        self._store({h: vector})
+        with self.lock:
+            self.misses += 1
+        return vector
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self):
+        return (f"Embedding cache: {self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate * 100:.0f}% of embedding calls saved)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+from collections import defaultdict
+from keyword_index import tokenize
+from name_index import normalize_name, species_prefix
+
+# CONFIGURATION
+EVOLUTION_FILE = "./pokedex/evolution_graph.json" # Written by helper/download_pokedex.py
+
+# "Charmander evolves into Charmeleon via leveling up starting at level 16." (one sentence per edge)
+SENTENCE_PATTERN = re.compile(r"(.+?) evolves into (.+?) via (.+?)(?:\.\s+(?=\S.*? evolves into )|\.$)")
+TRIGGERS = {"leveling": "level-up", "trading": "trade", "using": "use-item", "shedding": "shed", "special": "other"}
+CONDITION_WORDS = r"(?= during | while | with | at | knowing | if | \(|$)"
+
+def edges_from_text(evolution_info):
+    """
+    Rebuilds structured edges from the `evolution_info` prose, for a pokedex downloaded before
+    the graph file existed. The sentences are generated, so this round-trips exactly; only the
+    level and item conditions are recovered as fields, the rest stays in the method text.
+    """
+    edges = []
+    for source, target, method in SENTENCE_PATTERN.findall(evolution_info or ""):
+        conditions = {}
+        level = re.search(r"starting at level (\d+)", method)
+        if level:
+            conditions['min_level'] = int(level.group(1))
+        item = re.match(r"using (.+?)" + CONDITION_WORDS, method)
+        if item:
+            conditions['item'] = item.group(1)
+        held = re.search(r"while holding (.+?)" + CONDITION_WORDS, method)
+        if held:
+            conditions['held_item'] = held.group(1)
+        edges.append({"from": source, "to": target, "trigger": TRIGGERS.get(method.split()[0]),
+                      "conditions": conditions, "method": method})
+    return edges
+
+class EvolutionIndex:
+    """
+    The evolution graph as adjacency lists, answering without any retrieval:
+    - chain(name): the whole family, precomputed per family (O(1)).
+    - next(name) / previous(name): direct evolutions / pre-evolutions (O(degree)).
+    - matching(condition): every edge whose method mentions all the condition's words,
+      through an inverted index of method words (O(matches)).
+    """
+
+    def __init__(self, edges):
+        self.edges = edges
+        self.children = defaultdict(list) # species -> edge numbers
+        self.parents = defaultdict(list)
+        self.postings = defaultdict(set) # method / trigger / condition word -> edge numbers
+        self.species = {} # normalized name -> species as written in the graph ('mr mime' -> 'Mr Mime')
+        for number, edge in enumerate(edges):
+            self.children[edge['from']].append(number)
+            self.parents[edge['to']].append(number)
+            words = f"{edge['method']} {edge.get('trigger') or ''} {' '.join(map(str, edge.get('conditions', {}).values()))}"
+            for word in tokenize(words):
+                self.postings[word].add(number)
+            self.species.setdefault(normalize_name(edge['from']), edge['from'])
+            self.species.setdefault(normalize_name(edge['to']), edge['to'])
+
+        # Precompute every family's lines once: root -> text, species -> root
+        self.root = {}
+        self.lines = {}
+        for species in list(self.children) + list(self.parents):
+            root = species
+            while self.parents.get(root):
+                root = self.edges[self.parents[root][0]]['from']
+            self.root[species] = root
+            if root not in self.lines:
+                self.lines[root] = "\n".join(self._paths(root))
+
+    def _paths(self, species):
+        """Every path from species down to a final form: 'Gastly -> Haunter (leveling up ...) -> Gengar (trading)'."""
+        paths = []
+        for number in self.children.get(species, []):
+            edge = self.edges[number]
+            step = f"{species} -> {edge['to']} ({edge['method']})"
+            paths += [step + rest[len(edge['to']):] for rest in self._paths(edge['to'])]
+        return paths or [species]
+
+    @classmethod
+    def load(cls, path=EVOLUTION_FILE):
+        """The graph written by the downloader, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)['edges'])
+
+    @classmethod
+    def from_pokedex(cls, pokedex_data):
+        edges = {}
+        for p in pokedex_data:
+            for edge in edges_from_text(p['evolution_info']):
+                edges.setdefault((edge['from'], edge['to']), edge)
+        return cls([edges[key] for key in sorted(edges)])
+
+    def lookup(self, name, variants=()):
+        """
+        The graph's species for a canonical Pokedex name, or None if it's not part of any evolution.
+        Exact matches only (the name is resolved against the whole Pokedex first): a Pokemon that
+        doesn't evolve must not be answered as a similar looking one that does. Forms stored as
+        'Lycanroc-midday' are found through the species prefix they share with their variants ('Lycanroc').
+        """
+        species = self.species.get(normalize_name(name))
+        # 'maushold family of' (shared with its variants) -> 'maushold family' -> 'maushold'
+        words = (species_prefix(name, variants) or "").split()
+        while species is None and words:
+            species = self.species.get(" ".join(words))
+            words.pop()
+        return species
+
+    def chain(self, species):
+        """Every line of the species' family as text, one path per line, or None if it doesn't evolve."""
+        return self.lines.get(self.root.get(species))
+
+    def next(self, species, condition=""):
+        return self._filter(self.children.get(species, []), condition)
+
+    def previous(self, species):
+        return [self.edges[number] for number in self.parents.get(species, [])]
+
+    def matching(self, condition):
+        return [self.edges[number] for number in sorted(self._matching(condition))]
+
+    def _matching(self, condition):
+        words = tokenize(condition)
+        if not words:
+            return set()
+        return set.intersection(*(self.postings.get(word, set()) for word in words))
+
+    def _filter(self, numbers, condition):
+        if condition:
+            allowed = self._matching(condition)
+            numbers = [number for number in numbers if number in allowed]
+        return [self.edges[number] for number in numbers]
+
+def describe_edge(edge):
+    return f"{edge['from']} evolves into {edge['to']} via {edge['method']}"
@@ -0,0 +1,71 @@
+import json
+import re
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# CONFIGURATION
+FAKE_EMBEDDING_SIZE = 768 # Same as helper/embedding_pipeline.py, so a --fake-embeddings DB matches
+FAKE_EMBEDDING_MODEL = f"fake-{FAKE_EMBEDDING_SIZE}" # Name used as the embedding cache key
+
+def fake_embeddings():
+    return DeterministicFakeEmbedding(size=FAKE_EMBEDDING_SIZE)
+
+class FakeProfessorModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatOllama, so the agent, server and benchmarks run without a model server.
+    - Used as the SelfQuery query constructor (no tools bound): answers with the question and NO_FILTER.
+    - Used as the agent (tools bound): first turn calls `first_tool` with the question,
+      once the tool answered it replies with the start of the tool output.
+    Replies are streamed word by word so token streaming can be tested too.
+    """
+
+    first_tool: str = "search_pokedex_context"
+    tool_names: list[str] = []
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-professor"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(t, "name", None) or t["function"]["name"] for t in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _reply(self, messages):
+        self.calls += 1
+        last = messages[-1]
+
+        if not self.tool_names:
+            # Query constructor prompt: pull the question back out and ask for no filter
+            questions = re.findall(r"User Query:\s*(.*?)\s*Structured Request:", str(last.content), re.S)
+            query = questions[-1] if questions else str(last.content)
+            return AIMessage(content=f'```json\n{json.dumps({"query": query, "filter": "NO_FILTER"})}\n```')
+
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"According to the Pokedex: {str(last.content)[:300]}")
+
+        question = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        if self.first_tool in self.tool_names:
+            return AIMessage(content="", tool_calls=[
+                {"name": self.first_tool, "args": {"query": question}, "id": f"call_{self.calls}"}
+            ])
+        return AIMessage(content=f"I can't look that up: {question}")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._reply(messages)
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0}
+            ]))
+            return
+        for word in re.findall(r"\S+\s*", message.content):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
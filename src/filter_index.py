@@ -0,0 +1,183 @@
+import numpy as np
+from langchain_core.documents import Document
+from tracing import TRACER
+
+# CONFIGURATION
+# Fixed bit order, so a stored type_mask means the same thing whatever pokedex it was built from
+TYPE_ORDER = [
+    "normal", "fire", "water", "electric", "grass", "ice", "fighting", "poison", "ground",
+    "flying", "psychic", "bug", "rock", "ghost", "dragon", "dark", "steel", "fairy",
+]
+TYPE_BITS = {t: 1 << i for i, t in enumerate(TYPE_ORDER)}
+GENERATION_STARTS = [1, 152, 252, 387, 494, 650, 722, 810, 906] # First national dex number of each generation
+
+COMPARISONS = {
+    "$eq": np.equal, "$ne": np.not_equal,
+    "$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal,
+}
+
+def type_mask(types):
+    """['fire', 'flying'] -> bit of fire | bit of flying (unknown types add nothing)."""
+    mask = 0
+    for t in types:
+        mask |= TYPE_BITS.get(t.lower(), 0)
+    return mask
+
+def generation_of(pokemon_id):
+    return int(np.searchsorted(GENERATION_STARTS, pokemon_id, side="right"))
+
+class UnsupportedFilter(ValueError):
+    """The filter uses something the index can't evaluate; the caller asks Chroma instead."""
+
+class FilterIndex:
+    """
+    The vector DB's metadata and vectors, held in memory, to pre-narrow filtered searches.
+    A Chroma `where` filter is evaluated against precomputed columns: numbers as NumPy arrays,
+    strings and list values (types, abilities) as posting lists, and the "types" $contains
+    checks against the type_mask bits. Only the rows that qualify are then scored against the
+    query (same distance as the collection, exact), so a filtered search never walks the HNSW
+    graph and can't come back short the way a filtered ANN search can.
+    """
+
+    def __init__(self, ids, metadatas, documents, vectors, space="l2"):
+        self.ids = ids
+        self.metadatas = metadatas
+        self.documents = documents
+        # An empty collection (before create_db.py has run) has no vectors to take a dimension from
+        self.vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1) if ids else np.zeros((0, 0), dtype=np.float32)
+        self.space = space
+        if space == "cosine":
+            norms = np.linalg.norm(self.vectors, axis=1, keepdims=True)
+            self.vectors = self.vectors / np.where(norms == 0, 1, norms)
+        self.squared_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+        # Metadata columns: field -> float array (NaN = missing) / field -> value -> row numbers
+        self.numbers = {}
+        self.postings = {}
+        self.list_fields = set()
+        numeric_values = {}
+        for row, meta in enumerate(metadatas):
+            for field, value in (meta or {}).items():
+                if isinstance(value, (bool, int, float)):
+                    numeric_values.setdefault(field, {})[row] = float(value)
+                    continue
+                values = value if isinstance(value, list) else [value]
+                if isinstance(value, list):
+                    self.list_fields.add(field)
+                field_postings = self.postings.setdefault(field, {})
+                for item in values:
+                    field_postings.setdefault(item, []).append(row)
+        for field, values in numeric_values.items():
+            column = np.full(len(ids), np.nan)
+            column[list(values)] = list(values.values())
+            self.numbers[field] = column
+        self.postings = {field: {value: np.array(rows, dtype=np.int32) for value, rows in values.items()}
+                         for field, values in self.postings.items()}
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore):
+        collection = vectorstore._collection
+        stored = collection.get(include=["embeddings", "metadatas", "documents"])
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        return cls(stored["ids"], stored["metadatas"], stored["documents"], stored["embeddings"], space)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def has_field(self, field):
+        return field in self.numbers or field in self.postings
+
+    def _rows(self, field, value):
+        mask = np.zeros(len(self), dtype=bool)
+        rows = self.postings.get(field, {}).get(value)
+        if rows is not None:
+            mask[rows] = True
+        return mask
+
+    def mask(self, where):
+        """Boolean mask of the rows matching a Chroma `where` filter. Raises UnsupportedFilter."""
+        if not isinstance(where, dict) or not where:
+            raise UnsupportedFilter(f"Can't read filter {where!r}")
+        if len(where) > 1:
+            return self.mask({"$and": [{key: value} for key, value in where.items()]})
+        (key, condition), = where.items()
+        if key in ("$and", "$or"):
+            masks = [self.mask(part) for part in condition]
+            if not masks:
+                raise UnsupportedFilter(f"Empty {key}")
+            return np.logical_and.reduce(masks) if key == "$and" else np.logical_or.reduce(masks)
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        if len(condition) != 1:
+            return np.logical_and.reduce([self.mask({key: {op: value}}) for op, value in condition.items()])
+        (op, value), = condition.items()
+        if not self.has_field(key):
+            raise UnsupportedFilter(f"No '{key}' metadata in the DB")
+
+        if op in ("$contains", "$not_contains"):
+            if key not in self.list_fields:
+                raise UnsupportedFilter(f"'{key}' is not a list field")
+            if key == "types" and "type_mask" in self.numbers and isinstance(value, str) and value in TYPE_BITS:
+                found = (self.numbers["type_mask"].astype(np.int64) & TYPE_BITS[value]) != 0
+            else:
+                found = self._rows(key, value)
+            return ~found if op == "$not_contains" else found
+
+        if op in ("$in", "$nin"):
+            found = np.zeros(len(self), dtype=bool)
+            for item in value:
+                found |= self.mask({key: {"$eq": item}})
+            return ~found if op == "$nin" else found
+
+        if op not in COMPARISONS:
+            raise UnsupportedFilter(f"Unsupported operator {op}")
+        if key in self.numbers:
+            if not isinstance(value, (bool, int, float)):
+                raise UnsupportedFilter(f"'{key}' is numeric, got {value!r}")
+            with np.errstate(invalid="ignore"):
+                return COMPARISONS[op](self.numbers[key], float(value))
+        if op not in ("$eq", "$ne") or key in self.list_fields:
+            raise UnsupportedFilter(f"Can't apply {op} to '{key}'")
+        found = self._rows(key, value)
+        return ~found if op == "$ne" else found
+
+    def search(self, query_vector, where, k=4):
+        """Top k Documents among the rows matching `where`, closest first. Raises UnsupportedFilter."""
+        rows = np.flatnonzero(self.mask(where))
+        if len(rows) == 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        if self.space == "cosine":
+            query = query / (np.linalg.norm(query) or 1)
+        similarity = self.vectors[rows] @ query
+        if self.space == "l2":
+            # |x - q|^2 minus the constant |q|^2
+            distances = self.squared_norms[rows] - 2 * similarity
+        else:
+            distances = -similarity
+        k = min(k, len(rows))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return [Document(page_content=self.documents[row], metadata=self.metadatas[row], id=self.ids[row])
+                for row in rows[top]]
+
+    def install(self, vectorstore):
+        """
+        Routes vectorstore.similarity_search calls that carry a filter through this index,
+        so the fast path and the SelfQuery retriever both get it. Unfiltered searches, and
+        filters the index can't evaluate, still go to Chroma. Returns the vectorstore.
+        """
+        original = vectorstore.similarity_search
+
+        def prefiltered_search(query, k=4, filter=None, **kwargs):
+            if filter and not kwargs:
+                try:
+                    with TRACER.span("filter_index.search"):
+                        return self.search(vectorstore.embeddings.embed_query(query), filter, k)
+                except UnsupportedFilter:
+                    pass
+            return original(query, k=k, filter=filter, **kwargs)
+
+        vectorstore.similarity_search = prefiltered_search
+        return vectorstore
@@ -0,0 +1,112 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+import numpy as np
+
+# CONFIGURATION
+INDEX_FILE_NAME = "keyword_index.json" # Saved inside the Chroma folder, next to chroma.sqlite3
+FORMAT_VERSION = 1
+K1 = 1.2 # BM25 term frequency saturation
+B = 0.75 # BM25 length normalization
+RRF_K = 60 # Reciprocal rank fusion constant (the usual value from the RRF paper)
+
+# Words that appear in (nearly) every search_content blob or question and say nothing about which Pokemon
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "has", "have",
+    "how", "in", "into", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "via", "was",
+    "what", "when", "which", "who", "with", "pokemon", "name", "color", "shape", "types", "abilities",
+    "stats", "variants", "description", "evolution", "evolves",
+}
+
+def tokenize(text):
+    """'Iron-Moth has SOLAR BEAM' -> ['iron', 'moth', 'solar', 'beam']"""
+    return [word for word in re.findall(r"[a-z0-9]+", text.lower().replace("é", "e")) if word not in STOPWORDS]
+
+class KeywordIndex:
+    """
+    BM25 inverted index over the same search_content blobs the vector DB embeds.
+    Catches exact tokens embeddings blur: ability and item names, variant names, numbers.
+    Each posting list is stored as (doc numbers, precomputed BM25 weights), so a search
+    is one vectorized add per query term. Entries are keyed by the Pokemon id in the metadata.
+    """
+
+    def __init__(self, pokemon_ids, postings):
+        self.pokemon_ids = np.asarray(pokemon_ids, dtype=np.int32)
+        self.postings = postings # term -> (doc numbers, weights)
+
+    @classmethod
+    def build(cls, entries, k1=K1, b=B):
+        """entries: iterable of (pokemon id, text)."""
+        pokemon_ids, lengths = [], []
+        term_docs = defaultdict(list) # term -> [(doc number, tf)]
+        for number, (pokemon_id, text) in enumerate(entries):
+            tokens = tokenize(text or "")
+            pokemon_ids.append(pokemon_id)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_docs[term].append((number, tf))
+
+        n = len(pokemon_ids)
+        lengths = np.asarray(lengths, dtype=np.float32)
+        average = lengths.mean() if n else 1.0
+        postings = {}
+        for term, docs in term_docs.items():
+            numbers = np.array([d for d, _ in docs], dtype=np.int32)
+            tf = np.array([t for _, t in docs], dtype=np.float32)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1 - b + b * lengths[numbers] / average)
+            postings[term] = (numbers, (idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+        return cls(pokemon_ids, postings)
+
+    def search(self, query, k=10):
+        """Top k (pokemon id, score) for the query, best first. Empty if no query term is indexed."""
+        scores = np.zeros(len(self.pokemon_ids), dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+                matched = True
+        if not matched:
+            return []
+        k = min(k, int(np.count_nonzero(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((self.pokemon_ids[top], -scores[top]))] # Ties: lowest id first
+        return [(int(self.pokemon_ids[i]), float(scores[i])) for i in top]
+
+    def save(self, path, source=None):
+        payload = {
+            "version": FORMAT_VERSION,
+            "source": source,
+            "pokemon_ids": self.pokemon_ids.tolist(),
+            "postings": {term: [numbers.tolist(), [round(float(w), 5) for w in weights]]
+                         for term, (numbers, weights) in self.postings.items()},
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, source=None):
+        """The saved index, or None if it's missing, from another format version or built from another source."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if payload.get("version") != FORMAT_VERSION or (source is not None and payload.get("source") != source):
+            return None
+        postings = {term: (np.asarray(numbers, dtype=np.int32), np.asarray(weights, dtype=np.float32))
+                    for term, (numbers, weights) in payload["postings"].items()}
+        return cls(payload["pokemon_ids"], postings)
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """rankings: lists of keys, best first. Returns all keys ordered by sum of 1 / (k + rank)."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] += 1.0 / (k + rank)
+    return sorted(scores, key=lambda key: -scores[key])
@@ -0,0 +1,68 @@
+def normalize_move(name):
+    """'Solar-Beam ' -> 'solar beam' (same form remove_hyphens.py stores)."""
+    return " ".join(name.lower().replace("-", " ").split())
+
+class MoveIndex:
+    """
+    Bidirectional move index, built once from POKEDEX_DATA.
+    - move -> bitset of Pokemon rows (a Python int, bit i = row i learns the move)
+    - Pokemon -> frozenset of move ids
+    Membership is a set lookup and "who learns X and Y but not Z" is a couple of
+    integer AND / OR / NOT operations instead of one tool call per Pokemon.
+    """
+
+    def __init__(self, pokedex_data):
+        self.names = [p['name'] for p in pokedex_data]
+        self.rows = {p['name'].lower(): row for row, p in enumerate(pokedex_data)}
+        self.move_ids = {}
+        self.move_names = []
+        self.learners = [] # move id -> bitset of rows
+        self.movesets = [] # row -> frozenset of move ids
+
+        for row, p in enumerate(pokedex_data):
+            ids = set()
+            for move in p['moves']:
+                move = normalize_move(move)
+                move_id = self.move_ids.get(move)
+                if move_id is None:
+                    move_id = self.move_ids[move] = len(self.move_names)
+                    self.move_names.append(move)
+                    self.learners.append(0)
+                self.learners[move_id] |= 1 << row
+                ids.add(move_id)
+            self.movesets.append(frozenset(ids))
+        self.everyone = (1 << len(self.names)) - 1
+
+    def row(self, pokemon_name):
+        """Row of a Pokemon, or None if it isn't in the Pokedex."""
+        return self.rows.get(pokemon_name.lower().strip())
+
+    def move_id(self, move_name):
+        """Id of a move, or None if no Pokemon learns it."""
+        return self.move_ids.get(normalize_move(move_name))
+
+    def learns(self, row, move_id):
+        return move_id in self.movesets[row]
+
+    def learner_bits(self, all_of=(), any_of=(), none_of=()):
+        """Bitset of Pokemon that learn every move in all_of, at least one of any_of and none of none_of."""
+        bits = self.everyone
+        for move_id in all_of:
+            bits &= self.learners[move_id]
+        if any_of:
+            either = 0
+            for move_id in any_of:
+                either |= self.learners[move_id]
+            bits &= either
+        for move_id in none_of:
+            bits &= ~self.learners[move_id]
+        return bits
+
+    def rows_of(self, bits):
+        """Row numbers set in a bitset, in Pokedex order."""
+        rows = []
+        while bits:
+            lowest = bits & -bits
+            rows.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return rows
@@ -0,0 +1,134 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+# CONFIGURATION
+MIN_SCORE = 0.5 # Below this similarity we report "not found" instead of guessing
+
+def normalize_name(text):
+    """'Mr. Mime', 'mr-mime', 'MR MIME' -> 'mr mime'"""
+    text = text.lower().replace("♀", " f").replace("♂", " m")
+    text = re.sub(r"['’.:]", "", text)
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+def trigrams(text):
+    """Character trigrams of the text with spaces removed, padded so short names still match."""
+    compact = f"  {text.replace(' ', '')} "
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+@dataclass
+class Resolution:
+    value: str # Canonical name as stored in the Pokedex
+    score: float # 1.0 = exact alias, otherwise trigram similarity
+    matched: str # The alias that matched (e.g. a variant name)
+
+    @property
+    def exact(self):
+        return self.score >= 1.0
+
+class FuzzyIndex:
+    """
+    Alias table + trigram index over one vocabulary (Pokemon or moves).
+    Exact aliases are a dict lookup. Anything else is scored with the Dice coefficient
+    of character trigrams, but only against aliases sharing at least one trigram
+    (found through an inverted index), so a lookup touches a few dozen candidates.
+    """
+
+    def __init__(self):
+        self.aliases = {} # normalized alias -> canonical value
+        self.alias_grams = []
+        self.alias_list = []
+        self.postings = defaultdict(list) # trigram -> alias numbers
+
+    def add(self, alias, value):
+        alias = normalize_name(alias)
+        if not alias or alias in self.aliases:
+            return
+        self.aliases[alias] = value
+        # "solar beam" and "solarbeam" should both hit exactly
+        self.aliases.setdefault(alias.replace(" ", ""), value)
+        grams = trigrams(alias)
+        number = len(self.alias_list)
+        self.alias_list.append(alias)
+        self.alias_grams.append(len(grams))
+        for gram in grams:
+            self.postings[gram].append(number)
+
+    def resolve(self, text, min_score=MIN_SCORE):
+        """Best Resolution for `text`, or None if nothing scores above min_score."""
+        query = normalize_name(text)
+        if not query:
+            return None
+        value = self.aliases.get(query) or self.aliases.get(query.replace(" ", ""))
+        if value:
+            return Resolution(value, 1.0, query)
+
+        grams = trigrams(query)
+        shared = defaultdict(int)
+        for gram in grams:
+            for number in self.postings.get(gram, ()):
+                shared[number] += 1
+        if not shared:
+            return None
+
+        best = max(shared, key=lambda n: 2 * shared[n] / (len(grams) + self.alias_grams[n]))
+        score = 2 * shared[best] / (len(grams) + self.alias_grams[best])
+        if score < min_score:
+            return None
+        alias = self.alias_list[best]
+        return Resolution(self.aliases[alias], round(score, 2), alias)
+
+def species_prefix(name, variants):
+    """
+    'Deoxys-normal' + ['deoxys attack', ...] -> 'deoxys'.
+    The longest word prefix the default form shares with every variant, so people can
+    just type the species name. Returns None when that prefix is the full name anyway.
+    """
+    words = normalize_name(name).split()
+    prefix = words
+    for variant in variants:
+        other = normalize_name(variant).split()
+        common = 0
+        while common < min(len(prefix), len(other)) and prefix[common] == other[common]:
+            common += 1
+        prefix = prefix[:common]
+    if not variants or not prefix or len(prefix) == len(words):
+        return None
+    return " ".join(prefix)
+
+class NameResolver:
+    """Resolves free-form Pokemon and move names (typos, hyphens, spacing, variants) to canonical ones."""
+
+    def __init__(self, pokedex_data, move_names):
+        self.pokemon = FuzzyIndex()
+        for p in pokedex_data:
+            self.pokemon.add(p['name'], p['name'])
+        # Second pass so real names always win over derived aliases
+        for p in pokedex_data:
+            prefix = species_prefix(p['name'], p['variants'])
+            if prefix:
+                self.pokemon.add(prefix, p['name'])
+            for variant in p['variants']:
+                self.pokemon.add(variant, p['name'])
+
+        self.moves = FuzzyIndex()
+        for move in move_names:
+            self.moves.add(move, move)
+
+    def resolve_pokemon(self, text):
+        return self.pokemon.resolve(text)
+
+    def resolve_move(self, text):
+        return self.moves.resolve(text)
+
+    def mentions(self, text, max_words=3):
+        """Canonical Pokemon and move names written out exactly somewhere in `text` (up to max_words long)."""
+        words = normalize_name(text).split()
+        found = set()
+        for size in range(1, max_words + 1):
+            for start in range(len(words) - size + 1):
+                phrase = " ".join(words[start:start + size])
+                for index in (self.pokemon, self.moves):
+                    if phrase in index.aliases:
+                        found.add(index.aliases[phrase])
+        return found
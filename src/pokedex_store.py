@@ -0,0 +1,197 @@
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+import numpy as np
+
+# CONFIGURATION
+BIN_FILE = "./pokedex/pokedex.bin"
+
+MAGIC = b"PKDX"
+VERSION = 1
+STAT_KEYS = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+LIST_FIELDS = ["types", "abilities", "moves", "variants"]
+TEXT_FIELDS = ["description", "evolution_info", "search_content"]
+
+# magic, version, entry count, source size, source mtime, then (offset, length) of each section
+HEADER = struct.Struct("<4sHxxIQQ" + "QQ" * 5)
+
+# One fixed-width row per Pokemon. Strings are ids into the shared string table,
+# lists are (start, count) into the id pool, long texts are (offset, length) into the text blob.
+RECORD = np.dtype(
+    [("id", "<u4"), ("name", "<u4"), ("color", "<u4"), ("shape", "<u4"), ("stats", "<u2", (6,))]
+    + [(field, "<u4", (2,)) for field in LIST_FIELDS]
+    + [(field, "<u4", (2,)) for field in TEXT_FIELDS]
+)
+
+def source_signature(json_path):
+    stat = os.stat(json_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def compile_pokedex(json_path, bin_path):
+    """
+    Compiles pokedex.json into the binary format read by PokedexStore.
+    The JSON stays the source of truth: its size and mtime are stored in the header,
+    so a stale .bin is detected and rebuilt.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        pokedex_data = json.load(f)
+
+    strings, string_ids = [], {}
+    def intern(value):
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    records = np.zeros(len(pokedex_data), dtype=RECORD)
+    pool = []
+    texts = bytearray()
+    for row, p in enumerate(pokedex_data):
+        record = records[row]
+        record["id"] = p['id']
+        record["name"] = intern(p['name'])
+        record["color"] = intern(p['color'] or "")
+        record["shape"] = intern(p['shape'] or "")
+        record["stats"] = [p['stats'][key] for key in STAT_KEYS]
+        for field in LIST_FIELDS:
+            record[field] = (len(pool), len(p[field]))
+            pool.extend(intern(value) for value in p[field])
+        for field in TEXT_FIELDS:
+            encoded = (p[field] or "").encode("utf-8")
+            record[field] = (len(texts), len(encoded))
+            texts += encoded
+
+    encoded_strings = [s.encode("utf-8") for s in strings]
+    string_offsets = np.zeros(len(strings) + 1, dtype="<u4")
+    string_offsets[1:] = np.cumsum([len(s) for s in encoded_strings])
+
+    sections = [
+        string_offsets.tobytes(),
+        b"".join(encoded_strings),
+        records.tobytes(),
+        np.array(pool, dtype="<u4").tobytes(),
+        bytes(texts),
+    ]
+    offset = HEADER.size
+    layout = []
+    for section in sections:
+        layout += [offset, len(section)]
+        offset += len(section)
+
+    tmp_path = f"{bin_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(pokedex_data), *source_signature(json_path), *layout))
+        for section in sections:
+            f.write(section)
+    os.replace(tmp_path, bin_path)
+    return len(pokedex_data)
+
+class PokedexEntry(Mapping):
+    """One Pokemon, decoded field by field only when a field is actually read."""
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, key):
+        return self.store.field(self.row, key)
+
+    def __iter__(self):
+        return iter(self.store.FIELDS)
+
+    def __len__(self):
+        return len(self.store.FIELDS)
+
+    def __repr__(self):
+        return f"<PokedexEntry {self['name']}>"
+
+class PokedexStore:
+    """
+    Read-only, memory-mapped view of pokedex.bin that behaves like the list from json.load.
+    Opening it only parses the header: rows, stats and id pools are NumPy views over the
+    mapped file and every string is decoded (and interned) the first time it is used,
+    so descriptions and search blobs are never loaded unless something asks for them.
+    """
+
+    FIELDS = ["name", "id", "types", "color", "shape", "abilities", "stats", "moves",
+              "variants", "description", "evolution_info", "search_content"]
+
+    def __init__(self, bin_path=BIN_FILE):
+        self.file = open(bin_path, "rb")
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self.buffer, 0)
+        magic, version, count, self.source_size, self.source_mtime_ns = header[:5]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{bin_path} is not a version {VERSION} pokedex file")
+        (offsets_at, offsets_len, strings_at, _, records_at, _,
+         pool_at, pool_len, self.text_at, _) = header[5:]
+
+        self.string_offsets = np.frombuffer(self.buffer, dtype="<u4", count=offsets_len // 4, offset=offsets_at)
+        self.strings_at = strings_at
+        self.strings = [None] * (len(self.string_offsets) - 1)
+        self.records = np.frombuffer(self.buffer, dtype=RECORD, count=count, offset=records_at)
+        self.pool = np.frombuffer(self.buffer, dtype="<u4", count=pool_len // 4, offset=pool_at)
+        self.entries = [PokedexEntry(self, row) for row in range(count)]
+
+    def string(self, string_id):
+        value = self.strings[string_id]
+        if value is None:
+            start, end = self.string_offsets[string_id], self.string_offsets[string_id + 1]
+            value = self.strings[string_id] = self.buffer[self.strings_at + start:self.strings_at + end].decode("utf-8")
+        return value
+
+    def field(self, row, key):
+        record = self.records[row]
+        if key == "id":
+            return int(record["id"])
+        if key in ("name", "color", "shape"):
+            return self.string(record[key])
+        if key == "stats":
+            return dict(zip(STAT_KEYS, record["stats"].tolist()))
+        if key in LIST_FIELDS:
+            start, count = record[key]
+            return [self.string(i) for i in self.pool[start:start + count]]
+        if key in TEXT_FIELDS:
+            start, length = record[key]
+            return self.buffer[self.text_at + start:self.text_at + start + length].decode("utf-8")
+        raise KeyError(key)
+
+    def is_fresh(self, json_path):
+        return (self.source_size, self.source_mtime_ns) == source_signature(json_path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, row):
+        return self.entries[row]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def close(self):
+        self.records = self.pool = self.string_offsets = None
+        self.buffer.close()
+        self.file.close()
+
+def load_pokedex(json_path, bin_path=BIN_FILE):
+    """
+    Returns the Pokedex as a lazy PokedexStore, (re)compiling pokedex.bin first if it is
+    missing or older than the JSON. Falls back to plain json.load if compiling fails.
+    """
+    try:
+        if os.path.exists(bin_path):
+            store = PokedexStore(bin_path)
+            if store.is_fresh(json_path):
+                return store
+            store.close()
+        print(f"🔧 Compiling {json_path} -> {bin_path}...")
+        compile_pokedex(json_path, bin_path)
+        return PokedexStore(bin_path)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not use {bin_path} ({e}), loading the JSON instead.")
+        with open(json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+import uuid
+from collections import OrderedDict
+from langchain_core.messages import AIMessage, HumanMessage
+from tracing import TRACER
+
+# CONFIGURATION
+HOST = "127.0.0.1"
+PORT = 8000
+MAX_CONCURRENT_RUNS = 4 # Agent runs (= LLM calls, a run makes them one at a time) in flight at once
+MAX_WAITING = 32 # Requests allowed to queue for a run slot before we answer 503
+MAX_HISTORY_TURNS = 10 # Question/answer pairs kept per session
+MAX_SESSIONS = 1000 # Least recently used sessions are dropped past this
+MAX_BODY_BYTES = 64 * 1024
+
+class Session:
+    def __init__(self, session_id):
+        self.id = session_id
+        self.history = [] # (question, answer) pairs
+        self.lock = asyncio.Lock() # One question at a time per session keeps the history in order
+
+    def messages(self):
+        messages = []
+        for question, answer in self.history[-MAX_HISTORY_TURNS:]:
+            messages += [HumanMessage(content=question), AIMessage(content=answer)]
+        return messages
+
+class ProfessorServer:
+    """
+    Minimal asyncio HTTP server around one shared AgentExecutor.
+    Every session shares the loaded resources (Chroma, indexes, retriever, agent) and only owns
+    its chat history. Answers are streamed as Server-Sent Events over a chunked response:
+        POST   /chat            {"session_id": "...", "message": "..."}  -> token / tool / done events
+        DELETE /sessions/<id>   forget a session's history
+        GET    /health          run slots, queue length and session count
+        GET    /traces          per-stage latency histograms since startup
+    Backpressure: each streamed chunk waits for the client socket to drain, at most
+    `max_concurrent_runs` agent runs execute at once and at most `max_waiting` wait for a slot.
+    The first question of a session is looked up in `answer_cache` before taking a run slot;
+    follow-ups depend on the history, so they always go to the agent.
+    """
+
+    def __init__(self, agent_executor, max_concurrent_runs=MAX_CONCURRENT_RUNS, max_waiting=MAX_WAITING, answer_cache=None):
+        self.agent_executor = agent_executor
+        self.answer_cache = answer_cache
+        self.run_slots = asyncio.Semaphore(max_concurrent_runs)
+        self.max_concurrent_runs = max_concurrent_runs
+        self.max_waiting = max_waiting
+        self.waiting = 0
+        self.active = 0
+        self.sessions = OrderedDict()
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session(session_id)
+            while len(self.sessions) > MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+        self.sessions.move_to_end(session_id)
+        return session
+
+    # --- HTTP plumbing ---
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, path, _ = request_line.split(" ", 2)
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                return await self.send_json(writer, 413, {"error": "Request body too large"})
+            body = await reader.readexactly(length) if length else b""
+            await self.route(method, path, body, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass # Client went away, nothing to answer
+        except ValueError:
+            await self.send_json(writer, 400, {"error": "Malformed request"})
+        finally:
+            writer.close()
+
+    async def send_json(self, writer, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def send_event(self, writer, payload):
+        data = f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+        writer.write(f"{len(data):X}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain() # Backpressure: a slow client slows its own stream, not the server
+
+    async def route(self, method, path, body, writer):
+        if method == "GET" and path == "/health":
+            return await self.send_json(writer, 200, {
+                "status": "ok", "active_runs": self.active, "max_concurrent_runs": self.max_concurrent_runs,
+                "waiting": self.waiting, "sessions": len(self.sessions),
+                "answer_cache": self.answer_cache.summary() if self.answer_cache else None,
+            })
+        if method == "GET" and path == "/traces":
+            return await self.send_json(writer, 200, {"enabled": TRACER.enabled, "spans": TRACER.histograms()})
+        if method == "DELETE" and path.startswith("/sessions/"):
+            existed = self.sessions.pop(path[len("/sessions/"):], None) is not None
+            return await self.send_json(writer, 200 if existed else 404, {"deleted": existed})
+        if method == "POST" and path == "/chat":
+            request = json.loads(body or b"{}")
+            message = str(request.get("message", "")).strip()
+            if not message:
+                return await self.send_json(writer, 400, {"error": "'message' is required"})
+            return await self.chat(request.get("session_id") or uuid.uuid4().hex, message, writer)
+        return await self.send_json(writer, 404, {"error": f"No route for {method} {path}"})
+
+    # --- Chat ---
+
+    async def chat(self, session_id, message, writer):
+        if self.waiting >= self.max_waiting:
+            return await self.send_json(writer, 503, {"error": "Server busy, try again shortly"})
+
+        session = self.session(session_id)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+        )
+        await self.send_event(writer, {"type": "session", "session_id": session_id})
+
+        start = time.perf_counter()
+        standalone = self.answer_cache is not None and not session.history
+        if standalone:
+            # Embedding the question may call the model server, keep it off the event loop
+            answer, how = await asyncio.to_thread(self.answer_cache.get, message)
+            if answer is not None:
+                session.history.append((message, answer))
+                await self.send_event(writer, {"type": "token", "content": answer})
+                await self.send_event(writer, {"type": "done", "output": answer, "cached": how,
+                                               "seconds": round(time.perf_counter() - start, 3)})
+                writer.write(b"0\r\n\r\n")
+                return await writer.drain()
+
+        answer = None
+        self.waiting += 1
+        queued = True
+        try:
+            async with session.lock, self.run_slots:
+                self.waiting -= 1
+                queued = False
+                self.active += 1
+                try:
+                    answer = await self.run_agent(session, message, writer)
+                finally:
+                    self.active -= 1
+        except ConnectionError:
+            raise
+        except Exception as e:
+            await self.send_event(writer, {"type": "error", "message": str(e)})
+        finally:
+            if queued: # Cancelled or failed before getting a run slot
+                self.waiting -= 1
+
+        if answer is not None:
+            session.history.append((message, answer))
+            if standalone:
+                await asyncio.to_thread(self.answer_cache.put, message, answer)
+            await self.send_event(writer, {"type": "done", "output": answer, "seconds": round(time.perf_counter() - start, 3)})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def run_agent(self, session, message, writer):
+        """Streams the agent's tokens and tool calls to the client, returns the final answer."""
+        answer = None
+        inputs = {"input": message, "chat_history": session.messages()}
+        with TRACER.span("request", session=session.id):
+            config = {"callbacks": TRACER.callbacks()}
+            async for event in self.agent_executor.astream_events(inputs, config=config, version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream" and "agent" in event.get("tags", []):
+                    content = event["data"]["chunk"].content
+                    if content:
+                        await self.send_event(writer, {"type": "token", "content": content})
+                elif kind == "on_tool_start":
+                    await self.send_event(writer, {"type": "tool", "name": event["name"], "input": event["data"].get("input")})
+                elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+                    answer = event["data"]["output"]["output"]
+        return answer
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the Pokemon Professor to many users at once.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT_RUNS, help="Agent runs / LLM calls at once")
+    parser.add_argument("--max-waiting", type=int, default=MAX_WAITING, help="Queued requests before answering 503")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Always run the agent, even for repeated questions")
+    parser.add_argument("--fake", action="store_true", help="Use deterministic fake models instead of Ollama")
+    return parser.parse_args()
+
+async def serve(args):
+    if args.fake:
+        os.environ["POKEDEX_FAKE_MODELS"] = "1"
+    # Imported here so --fake is seen by chat.py's configuration, and loaded only once for all sessions
+    import chat
+    # chat.py loads its stages in parallel in the background; only listen once they're all done
+    await asyncio.to_thread(chat.wait_until_ready)
+
+    llm = chat.make_chat_model()
+    llm.tags = ["agent"] # Lets us tell the agent's tokens apart from the SelfQuery LLM's
+    server = ProfessorServer(chat.build_agent_executor(llm, verbose=False), args.max_concurrent, args.max_waiting,
+                             answer_cache=None if args.no_answer_cache else chat.ANSWER_CACHE)
+    listener = await asyncio.start_server(server.handle, args.host, args.port)
+    print(f"\n🔵 Pokemon Professor serving on http://{args.host}:{args.port} "
+          f"({args.max_concurrent} concurrent runs, {args.max_waiting} queued max)")
+    # docker stop / systemd / process managers send SIGTERM: stop serving like Ctrl+C does
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, listener.close)
+    except NotImplementedError:
+        pass # Windows event loops have no signal handlers
+    async with listener:
+        try:
+            await listener.serve_forever()
+        except asyncio.CancelledError:
+            print("\n⏹️ Stopping.")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # However the server stops (Ctrl+C, SIGTERM, an error), the spans so far are kept
+        if TRACER.enabled:
+            print(f"\n💾 {TRACER.export()} spans saved to the trace file")
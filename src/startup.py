@@ -0,0 +1,122 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# CONFIGURATION
+MAX_WORKERS = 8 # Stages loading at the same time
+
+class Startup:
+    """
+    Named loading stages with dependencies, run on a thread pool.
+    Each stage is a function receiving the results of the stages listed in `after`; its result
+    is published into `namespace` (a module's globals()) under the stage name, so code using
+    those globals works unchanged once the stage is done.
+    - start() launches every stage in the background, independent ones in parallel.
+    - In lazy mode nothing runs until wait(name) / wait_for(...), which start only those stages and their dependencies.
+    Warm-up stages (warmup=True) run like the others but don't count towards being ready.
+    """
+
+    def __init__(self, namespace, lazy=False, workers=MAX_WORKERS):
+        self.namespace = namespace
+        self.lazy = lazy
+        self.stages = {} # name -> (fn, after, warmup)
+        self.futures = {}
+        self.timings = {} # name -> seconds spent in the stage itself (not waiting for dependencies)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="startup")
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.started_at = time.perf_counter()
+        self.ready_after = None
+
+    def stage(self, name, after=(), warmup=False):
+        def register(fn):
+            self.stages[name] = (fn, list(after), warmup)
+            return fn
+        return register
+
+    def _submit(self, name):
+        with self.lock:
+            future = self.futures.get(name)
+            if future is not None:
+                return future
+            # Claimed under the lock, so a stage shared by several others is only run once
+            self.futures[name] = placeholder = Future()
+        # Dependencies are queued before the stage itself, so with a FIFO pool a stage only
+        # starts once its dependencies are running or done: no worker waits on queued work.
+        for dependency in self.stages[name][1]:
+            self._submit(dependency)
+        future = self.pool.submit(self._run, name)
+        future.add_done_callback(lambda f: self._chain(f, placeholder))
+        return placeholder
+
+    @staticmethod
+    def _chain(source, target):
+        if source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            target.set_result(source.result())
+
+    def _run(self, name):
+        fn, after, warmup = self.stages[name]
+        inputs = [self.futures[dependency].result() for dependency in after]
+        start = time.perf_counter()
+        result = fn(*inputs)
+        self.timings[name] = time.perf_counter() - start
+        if not warmup:
+            self.namespace[name] = result
+        return result
+
+    def start(self):
+        """Starts every stage in the background (a no-op in lazy mode). Returns immediately."""
+        if not self.lazy:
+            for name in self.stages:
+                self._submit(name)
+        return self
+
+    def wait(self, name):
+        """Result of one stage, loading it (and what it needs) first if necessary."""
+        if name not in self.stages:
+            raise AttributeError(name)
+        return self._submit(name).result()
+
+    def wait_for(self, *names):
+        """Results of several stages, all started (in lazy mode) before waiting on any of them."""
+        for name in names:
+            if name not in self.stages:
+                raise AttributeError(name)
+        futures = [self._submit(name) for name in names]
+        return [future.result() for future in futures]
+
+    def wait_until_ready(self):
+        """Blocks until every non-warm-up stage is loaded. Raises if one of them failed."""
+        if not self.ready.is_set():
+            for name, (_, _, warmup) in self.stages.items():
+                if not warmup:
+                    self.wait(name)
+            with self.lock:
+                if self.ready_after is None:
+                    self.ready_after = time.perf_counter() - self.started_at
+            self.ready.set()
+        return self.ready_after
+
+    def status(self):
+        """name -> 'pending' / 'loading' / 'done' / 'failed', for health checks."""
+        states = {}
+        for name in self.stages:
+            future = self.futures.get(name)
+            if future is None:
+                states[name] = "pending"
+            elif not future.done():
+                states[name] = "done" if name in self.timings else "loading"
+            else:
+                states[name] = "failed" if future.exception() else "done"
+        return states
+
+    def report(self):
+        if self.ready_after is not None:
+            lines = [f"🔵 Ready in {self.ready_after:.2f}s"]
+        else:
+            lines = ["💤 Loaded on demand so far:" if self.lazy else "⏳ Still loading"]
+        for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            lines.append(f"   {seconds * 1000:8.1f} ms  {name}")
+        return "\n".join(lines)
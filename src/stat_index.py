@@ -0,0 +1,149 @@
+import re
+import numpy as np
+
+# Column name -> key in pokedex.json 'stats'
+STAT_FIELDS = {
+    "hp": "hp",
+    "attack": "attack",
+    "defense": "defense",
+    "special_attack": "special-attack",
+    "special_defense": "special-defense",
+    "speed": "speed",
+}
+STAT_LABELS = {"hp": "HP", "attack": "Atk", "defense": "Def", "special_attack": "SpA", "special_defense": "SpD", "speed": "Spe"}
+
+# Extra spellings the LLM (or a user) might send -> column name
+FIELD_ALIASES = {
+    "special-attack": "special_attack", "sp_atk": "special_attack", "spatk": "special_attack", "spa": "special_attack",
+    "special-defense": "special_defense", "sp_def": "special_defense", "spdef": "special_defense", "spd": "special_defense",
+    "atk": "attack", "def": "defense", "spe": "speed",
+    "bst": "total", "base_stat_total": "total", "stat_total": "total",
+    "types": "type", "abilities": "ability",
+}
+
+OPERATORS = {
+    ">=": np.greater_equal, "<=": np.less_equal, "!=": np.not_equal,
+    ">": np.greater, "<": np.less, "==": np.equal, "=": np.equal,
+}
+CONDITION_PATTERN = re.compile(r"^\s*([a-z_\- ]+?)\s*(>=|<=|!=|==|=|>|<)\s*(.+?)\s*$")
+
+def value_key(value):
+    """'Run-Away', 'run away' -> 'run away' (the pokedex may or may not have been through remove_hyphens.py)"""
+    return " ".join(value.lower().replace("-", " ").split())
+
+class StatIndex:
+    """
+    Column store of the whole Pokedex for exact stat questions.
+    Every attribute is a NumPy column (stats, base stat total, id, color, shape) and types /
+    abilities are boolean membership matrices, so a filter is a handful of vectorized
+    comparisons over ~1000 rows instead of a vector search that only sees its top-k.
+    Unlike the vector DB metadata, ALL types and abilities of a Pokemon are indexed.
+    """
+
+    def __init__(self, pokedex_data):
+        self.names = [p['name'] for p in pokedex_data]
+        self.ids = np.array([p['id'] for p in pokedex_data], dtype=np.int32)
+        self.stats = {
+            field: np.array([p['stats'][key] for p in pokedex_data], dtype=np.int16)
+            for field, key in STAT_FIELDS.items()
+        }
+        self.stats["total"] = np.sum(list(self.stats.values()), axis=0, dtype=np.int16)
+
+        # Categorical columns: small integer codes + the vocabulary
+        self.colors, self.color_codes = self._encode([p['color'] for p in pokedex_data])
+        self.shapes, self.shape_codes = self._encode([p['shape'] or "unknown" for p in pokedex_data])
+
+        # Multi-valued columns: one boolean column per type / ability
+        self.types, self.type_matrix = self._membership([p['types'] for p in pokedex_data])
+        self.abilities, self.ability_matrix = self._membership([p['abilities'] for p in pokedex_data])
+        self.row_types = [p['types'] for p in pokedex_data]
+
+    @staticmethod
+    def _encode(values):
+        vocab = sorted({value_key(v) for v in values})
+        lookup = {v: i for i, v in enumerate(vocab)}
+        return lookup, np.array([lookup[value_key(v)] for v in values], dtype=np.int16)
+
+    @staticmethod
+    def _membership(value_lists):
+        vocab = sorted({value_key(v) for values in value_lists for v in values})
+        lookup = {v: i for i, v in enumerate(vocab)}
+        matrix = np.zeros((len(value_lists), len(vocab)), dtype=bool)
+        for row, values in enumerate(value_lists):
+            matrix[row, [lookup[value_key(v)] for v in values]] = True
+        return lookup, matrix
+
+    def __len__(self):
+        return len(self.names)
+
+    def mask(self, field, op, value):
+        """Boolean mask of the rows matching one condition, e.g. ("speed", ">", "100")."""
+        field = field.strip().lower().replace(" ", "_")
+        field = FIELD_ALIASES.get(field, field)
+        compare = OPERATORS[op]
+        value = value.strip().strip("'\"")
+
+        if field in self.stats or field == "id":
+            column = self.ids if field == "id" else self.stats[field]
+            return compare(column, int(value))
+
+        if field in ("type", "ability", "color", "shape"):
+            if op not in ("=", "==", "!="):
+                raise ValueError(f"'{field}' only supports = and !=")
+            key = value_key(value)
+            if field in ("type", "ability"):
+                lookup, matrix = (self.types, self.type_matrix) if field == "type" else (self.abilities, self.ability_matrix)
+                if key not in lookup:
+                    raise ValueError(f"Unknown {field} '{value}'")
+                column = matrix[:, lookup[key]]
+                return ~column if op == "!=" else column
+            lookup, codes = (self.colors, self.color_codes) if field == "color" else (self.shapes, self.shape_codes)
+            if key not in lookup:
+                raise ValueError(f"Unknown {field} '{value}'")
+            return compare(codes, lookup[key])
+
+        raise ValueError(f"Unknown field '{field}'")
+
+    def query(self, conditions=(), sort_by=None, descending=True, limit=10):
+        """
+        conditions: iterable of (field, op, value), all ANDed together.
+        Returns (total number of matches, row indices of the top `limit` sorted by `sort_by`).
+        """
+        selected = np.ones(len(self), dtype=bool)
+        for field, op, value in conditions:
+            selected &= self.mask(field, op, value)
+        rows = np.flatnonzero(selected)
+        total = len(rows)
+
+        if sort_by:
+            field = sort_by.strip().lower().replace(" ", "_")
+            field = FIELD_ALIASES.get(field, field)
+            if field not in self.stats and field != "id":
+                raise ValueError(f"Can't sort by '{sort_by}'")
+            column = (self.ids if field == "id" else self.stats[field])[rows].astype(np.int64)
+            # Unique keys: ties are broken by Pokedex order, so results never depend on argpartition
+            keys = (-column if descending else column) * (len(self) + 1) + np.arange(len(rows))
+            if limit and limit < len(rows):
+                # Only the top `limit` rows need an exact order
+                top = np.argpartition(keys, limit - 1)[:limit]
+                rows = rows[top[np.argsort(keys[top])]]
+            else:
+                rows = rows[np.argsort(keys)]
+
+        return total, rows[:limit] if limit else rows
+
+    def describe(self, row):
+        stats = " / ".join(f"{STAT_LABELS[f]} {self.stats[f][row]}" for f in STAT_FIELDS)
+        return f"{self.names[row]} (#{self.ids[row]}, {'/'.join(self.row_types[row])}): {stats} (Total {self.stats['total'][row]})"
+
+def parse_conditions(text):
+    """'type=water, speed>100 and attack >= 120' -> [('type', '=', 'water'), ('speed', '>', '100'), ...]"""
+    conditions = []
+    for part in re.split(r",|;|\band\b", text or ""):
+        if not part.strip():
+            continue
+        match = CONDITION_PATTERN.match(part.lower())
+        if not match:
+            raise ValueError(f"Can't read condition '{part.strip()}' (use e.g. speed>100 or type=fire)")
+        conditions.append(match.groups())
+    return conditions
@@ -0,0 +1,295 @@
+import re
+from dataclasses import dataclass
+from typing import Any
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from keyword_index import reciprocal_rank_fusion
+from tracing import TRACER
+
+# Stat metadata field -> the ways people write it (longest first so "special attack" beats "attack")
+STAT_ALIASES = {
+    "special_attack": ["special attack", "sp attack", "sp atk", "spatk", "spa"],
+    "special_defense": ["special defense", "special defence", "sp defense", "sp def", "spdef", "spd"],
+    "hp": ["hit points", "health", "hp"],
+    "attack": ["attack", "atk"],
+    "defense": ["defense", "defence", "def"],
+    "speed": ["speed", "spe"],
+}
+
+# Only in a DB with the full metadata schema (see create_db.py)
+TOTAL_ALIASES = ["base stat total", "stat total", "bst", "total"]
+
+# Comparison phrases -> Chroma operator
+COMPARATORS = {
+    ">=": "$gte", "=>": "$gte", "at least": "$gte", "no less than": "$gte", "greater than or equal to": "$gte",
+    "<=": "$lte", "=<": "$lte", "at most": "$lte", "no more than": "$lte", "less than or equal to": "$lte",
+    ">": "$gt", "more than": "$gt", "greater than": "$gt", "higher than": "$gt", "bigger than": "$gt",
+    "above": "$gt", "over": "$gt",
+    "<": "$lt", "less than": "$lt", "lower than": "$lt", "smaller than": "$lt", "fewer than": "$lt",
+    "below": "$lt", "under": "$lt",
+    "==": "$eq", "=": "$eq", "exactly": "$eq", "equal to": "$eq", "equals": "$eq", "of": "$eq", "is": "$eq",
+}
+
+# "100+ speed", "speed 100 or more"
+SUFFIX_COMPARATORS = {
+    "+": "$gte", "or more": "$gte", "or higher": "$gte", "or above": "$gte", "and up": "$gte", "and above": "$gte",
+    "or less": "$lte", "or lower": "$lte", "or below": "$lte", "and below": "$lte", "and under": "$lte",
+}
+
+# Words that mean the question needs more than a plain AND of equalities / ranges.
+# If any of these is left over after parsing, we let the LLM build the filter instead.
+AMBIGUOUS_WORDS = {
+    "faster", "slower", "stronger", "weaker", "bulkier", "fastest", "slowest", "strongest", "weakest",
+    "highest", "lowest", "best", "worst", "most", "least", "more", "less", "greater", "higher", "lower",
+    "bigger", "smaller", "above", "below", "over", "under", "than", "between", "top", "bottom", "max",
+    "min", "maximum", "minimum", "average", "total", "sum",
+    "not", "no", "non", "without", "except", "excluding", "nor", "neither",
+    "similar", "versus", "vs", "compared", "instead",
+    "high", "low", "fast", "slow", "strong", "weak", "bulky", "tanky", "special",
+    "type", "types", "typed", "color", "colour", "colored", "coloured", "shape", "shaped",
+    "ability", "abilities", "stat", "stats", "named", "called", "id", "number",
+} | {word for aliases in STAT_ALIASES.values() for alias in aliases for word in alias.split()}
+
+@dataclass
+class ParsedQuery:
+    query: str # Text for the vector search
+    where: dict | None # Chroma metadata filter, None = plain similarity search
+
+def normalize(text):
+    """Lowercase, hyphens/underscores to spaces, collapse whitespace."""
+    return " ".join(re.sub(r"[-_]", " ", text.lower()).split())
+
+def _alternation(values):
+    """Regex alternation of literal values, longest first so multi-word values win."""
+    return "|".join(re.escape(v) for v in sorted(values, key=len, reverse=True))
+
+def _combine(conditions):
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+class StructuredQueryParser:
+    """
+    Rule-based replacement for the SelfQuery LLM call on filter-style questions.
+    Understands the same attributes as `metadata_field_info` in chat.py (type, color, shape,
+    ability, the six stats, name and id) and compiles them straight into a Chroma `where` filter.
+    With `multi_valued` (a DB storing the full type / ability sets), "flying types" matches
+    a type in any slot via `types $contains`, "fire/flying types" both, and base stat total
+    and generation are understood too.
+    `parse()` returns None whenever the question looks like it needs the LLM (comparatives,
+    negations, attribute words we could not pin down), so it never guesses a wrong filter.
+    """
+
+    def __init__(self, pokedex_data, multi_valued=False):
+        # normalized text -> value exactly as stored in the vector DB metadata
+        slots = slice(None) if multi_valued else slice(1) # Every type / ability, or the primary one
+        self.types = {normalize(t): t for p in pokedex_data for t in p['types'][slots]}
+        self.colors = {normalize(p['color']): p['color'] for p in pokedex_data}
+        self.shapes = {normalize(p['shape']): p['shape'] for p in pokedex_data if p['shape']}
+        self.abilities = {normalize(a): a for p in pokedex_data for a in p['abilities'][slots]}
+        self.names = {normalize(p['name']): p['name'] for p in pokedex_data}
+        # Every type / color / ability value, used to spot leftovers we could not turn into a filter
+        self.all_types = {normalize(t) for p in pokedex_data for t in p['types']}
+        self.all_abilities = {normalize(a) for p in pokedex_data for a in p['abilities']}
+        type_field, ability_field, member = ("types", "abilities", "$contains") if multi_valued else ("type", "ability", "$eq")
+
+        self.stat_lookup = {alias: field for field, aliases in STAT_ALIASES.items() for alias in aliases}
+        if multi_valued:
+            self.stat_lookup.update({alias: "total" for alias in TOTAL_ALIASES})
+        stat = f"(?P<stat>{_alternation(self.stat_lookup)})"
+        op = f"(?P<op>{_alternation(COMPARATORS)})"
+        suffix = f"(?P<suffix>{_alternation(SUFFIX_COMPARATORS)})"
+        num = r"(?P<num>\d+)"
+
+        self.stat_patterns = [
+            # "speed between 80 and 100", "between 80 and 100 speed"
+            re.compile(rf"\b(?:base\s+)?{stat}(?:\s+stats?)?\s+(?:is\s+)?between\s+(?P<low>\d+)\s+and\s+(?P<high>\d+)"),
+            re.compile(rf"\bbetween\s+(?P<low>\d+)\s+and\s+(?P<high>\d+)\s+(?:base\s+)?{stat}\b"),
+            # "speed > 100", "speed is over 100", "attack of at least 120", "speed 100+"
+            re.compile(rf"\b(?:base\s+)?{stat}(?:\s+stats?)?\s*(?:is\s+|of\s+)?{op}?\s*{num}(?:\s*{suffix})?"),
+            # "over 100 speed", "> 100 speed", "100+ speed", "100 or more speed"
+            re.compile(rf"(?:(?<![a-z]){op}\s*)?{num}(?:\s*{suffix})?\s+(?:base\s+)?{stat}\b"),
+        ]
+        # (metadata field, operator, normalized -> stored values, pattern with a `value` group)
+        self.value_patterns = [
+            (type_field, member, self.types, re.compile(rf"\b(?P<value>{_alternation(self.types)})\s+(?:types?|typed)\b")),
+            (type_field, member, self.types, re.compile(rf"\btype\s+(?:is\s+|of\s+)?(?P<value>{_alternation(self.types)})\b")),
+            ("color", "$eq", self.colors, re.compile(rf"\b(?P<value>{_alternation(self.colors)})\s+colou?r(?:ed)?\b")),
+            ("color", "$eq", self.colors, re.compile(rf"\bcolou?r(?:ed)?\s+(?:is\s+|of\s+)?(?P<value>{_alternation(self.colors)})\b")),
+            ("shape", "$eq", self.shapes, re.compile(rf"\b(?P<value>{_alternation(self.shapes)})\s+shaped?\b")),
+            ("shape", "$eq", self.shapes, re.compile(rf"\bshaped?\s+(?:is\s+|of\s+|like\s+(?:an?\s+)?)?(?P<value>{_alternation(self.shapes)})\b")),
+            (ability_field, member, self.abilities, re.compile(rf"\b(?:the\s+)?(?P<value>{_alternation(self.abilities)})\s+ability\b")),
+            (ability_field, member, self.abilities, re.compile(rf"\bability\s+(?:is\s+|of\s+|called\s+)?(?P<value>{_alternation(self.abilities)})\b")),
+            ("name", "$eq", self.names, re.compile(rf"\b(?:named|called|name\s+is|name)\s+(?P<value>{_alternation(self.names)})\b")),
+        ]
+        # "fire/flying types", "water ground type" - both types, in either slot
+        self.dual_type_pattern = multi_valued and re.compile(
+            rf"\b(?P<first>{_alternation(self.types)})\s*[/ ]\s*(?P<second>{_alternation(self.types)})\s+(?:dual\s+)?(?:types?|typed)\b"
+        )
+        # "gen 4", "generation 4", "4th generation"
+        self.generation_pattern = multi_valued and re.compile(
+            r"\b(?:gen(?:eration)?\s*(?P<num>[1-9])|(?P<ordinal>[1-9])(?:st|nd|rd|th)\s+gen(?:eration)?)\b"
+        )
+        self.id_pattern = re.compile(r"(?:#\s*|\bid\s+(?:is\s+|of\s+|=\s*)?|\bid\s*=\s*|\b(?:pokedex\s+)?(?:number|no\.?)\s*)(?P<num>\d+)\b")
+        self.bare_name_pattern = re.compile(rf"\b(?:{_alternation(self.names)})\b")
+        self.leftover_value_pattern = re.compile(
+            rf"\b(?:{_alternation(self.all_types | set(self.colors) | set(self.shapes) | self.all_abilities)})\b"
+        )
+
+    def _stat_condition(self, match):
+        field = self.stat_lookup[match.group("stat")]
+        groups = match.groupdict()
+        if groups.get("low") is not None:
+            return [{field: {"$gte": int(groups["low"])}}, {field: {"$lte": int(groups["high"])}}]
+
+        op = "$eq"
+        if groups.get("op"):
+            op = COMPARATORS[groups["op"]]
+        if groups.get("suffix"):
+            suffix_op = SUFFIX_COMPARATORS[groups["suffix"]]
+            if groups.get("op") and COMPARATORS[groups["op"]] not in ("$eq", suffix_op):
+                return None # "over 100 or less speed" - contradictory, let the LLM sort it out
+            op = suffix_op
+        return [{field: {op: int(groups["num"])}}]
+
+    def parse(self, query):
+        """Returns a ParsedQuery, or None if the LLM query constructor should handle it."""
+        text = normalize(query)
+        conditions = []
+        spans = []
+
+        def claim(match):
+            # Only accept a match that does not overlap text another rule already used
+            start, end = match.span()
+            if any(start < e and s < end for s, e in spans):
+                return False
+            spans.append((start, end))
+            return True
+
+        for pattern in self.stat_patterns:
+            for match in pattern.finditer(text):
+                if not claim(match):
+                    continue
+                condition = self._stat_condition(match)
+                if condition is None:
+                    return None
+                conditions.extend(condition)
+
+        if self.dual_type_pattern:
+            for match in self.dual_type_pattern.finditer(text):
+                if claim(match):
+                    conditions += [{"types": {"$contains": self.types[match.group(slot)]}} for slot in ("first", "second")]
+
+        for field, op, values, pattern in self.value_patterns:
+            for match in pattern.finditer(text):
+                if claim(match):
+                    conditions.append({field: {op: values[match.group("value")]}})
+
+        if self.generation_pattern:
+            for match in self.generation_pattern.finditer(text):
+                if claim(match):
+                    conditions.append({"generation": {"$eq": int(match.group("num") or match.group("ordinal"))}})
+
+        for match in self.id_pattern.finditer(text):
+            if claim(match):
+                conditions.append({"id": {"$eq": int(match.group("num"))}})
+
+        # Whatever is left must be free text, otherwise the parse is ambiguous
+        leftover = text
+        for start, end in sorted(spans, reverse=True):
+            leftover = leftover[:start] + " " + leftover[end:]
+        words = set(re.findall(r"[a-z]+", leftover))
+        if re.search(r"\d|[<>=]", leftover) or words & AMBIGUOUS_WORDS:
+            return None
+        if self.leftover_value_pattern.search(leftover):
+            return None # e.g. "fire" without "type": might be a filter, might be lore
+        if conditions and "or" in words:
+            return None # We only build AND filters
+
+        names = set(self.bare_name_pattern.findall(leftover))
+        if len(names) > 1:
+            return None # Comparing Pokemon, let the LLM decide
+        if names and conditions:
+            return None # "Is Charizard a water type?" - a filter on its own would drop Charizard
+        if names:
+            # "Who is Gengar?" - same filter the LLM constructor builds for a single named Pokemon
+            conditions.append({"name": {"$eq": self.names[names.pop()]}})
+
+        return ParsedQuery(query=query, where=_combine(conditions))
+
+class FastPathRetriever(BaseRetriever):
+    """
+    Tries the rule-based parser first and only pays for the SelfQuery LLM call when it gives up.
+    With a `keyword_index`, BM25 hits for the question are fused with the vector results by
+    reciprocal rank fusion, so exact names (abilities, items, variants) make the top k too.
+    The keyword hits go through the same metadata filter as the vector search, whether the
+    parser or the LLM query constructor built it.
+    """
+
+    vectorstore: VectorStore
+    fallback: BaseRetriever # The SelfQueryRetriever (its query constructor and translator are used)
+    parser: StructuredQueryParser
+    keyword_index: Any = None # keyword_index.KeywordIndex
+    k: int = 4
+    fetch_k: int = 10 # Candidates taken from each side before fusing
+    verbose: bool = False
+    fast_path_hits: int = 0
+    fallbacks: int = 0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        with TRACER.span("query.parse"):
+            parsed = self.parser.parse(query)
+        if parsed is None:
+            self.fallbacks += 1
+            if self.verbose:
+                print("🐢 No clear filter, asking the LLM query constructor...")
+            with TRACER.span("query.self_query"):
+                # Only the LLM query constructor: its filter has to restrict the keyword hits too,
+                # and the search below takes fetch_k candidates like the fast path does
+                structured = self.fallback.query_constructor.invoke(
+                    {"query": query}, config={"callbacks": run_manager.get_child()}
+                )
+                new_query, search_kwargs = self.fallback.structured_query_translator.visit_structured_query(structured)
+            where = search_kwargs.get("filter")
+            if self.verbose:
+                print(f"🐢 LLM filter: {where}")
+            return self._search(query, query if self.fallback.use_original_query else new_query, where, structured.limit)
+
+        self.fast_path_hits += 1
+        if self.verbose:
+            print(f"⚡ Fast path filter: {parsed.where}")
+        return self._search(query, parsed.query, parsed.where)
+
+    def _search(self, query, search_query, where, limit=None):
+        k = limit or (self.fetch_k if self.keyword_index is not None else self.k)
+        if where:
+            docs = self.vectorstore.similarity_search(search_query, k=k, filter=where)
+        else:
+            docs = self.vectorstore.similarity_search(search_query, k=k)
+        return self._fuse(query, docs, where)
+
+    def _fuse(self, query, vector_docs, where):
+        """Top k of the vector docs and the BM25 hits (restricted to `where`) by reciprocal rank fusion."""
+        if self.keyword_index is None:
+            return vector_docs[:self.k]
+        with TRACER.span("keyword.search"):
+            hits = [pokemon_id for pokemon_id, _ in self.keyword_index.search(query, self.fetch_k)]
+        if not hits:
+            return vector_docs[:self.k]
+
+        # Fetch the hits from Chroma by their Pokemon id, through the same filter as the vector search
+        condition = {"id": {"$in": hits}}
+        stored = self.vectorstore.get(where={"$and": [where, condition]} if where else condition)
+        docs = {meta.get("id"): Document(page_content=text, metadata=meta, id=doc_id)
+                for doc_id, text, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])}
+        keyword_ranking = [pokemon_id for pokemon_id in hits if pokemon_id in docs]
+        docs.update({doc.metadata.get("id"): doc for doc in vector_docs})
+
+        fused = reciprocal_rank_fusion([[doc.metadata.get("id") for doc in vector_docs], keyword_ranking])
+        return [docs[pokemon_id] for pokemon_id in fused[:self.k]]
@@ -0,0 +1,258 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from langchain_core.callbacks import BaseCallbackHandler
+
+# CONFIGURATION
+# POKEDEX_TRACE=0 turns tracing off: span() hands back a shared no-op and nothing is recorded.
+TRACE_ENABLED = os.environ.get("POKEDEX_TRACE", "1") == "1"
+TRACE_FILE = os.environ.get("POKEDEX_TRACE_FILE", "./pokedex/trace.json") # Chrome / Perfetto trace format
+MAX_SPANS = 50000 # Finished spans kept for export, oldest dropped first
+MAX_TRACES = 200 # Recent requests kept for per-request summaries
+MAX_SAMPLES = 10000 # Durations kept per span name for percentiles
+HISTOGRAM_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 30000]
+
+NULL_SPAN = nullcontext()
+_current = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attrs", "thread")
+
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs
+        self.thread = threading.get_ident()
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+class SpanStats:
+    """Running count / total / histogram for one span name, plus recent samples for percentiles."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        self.tokens = defaultdict(int)
+
+    def add(self, span):
+        seconds = span.duration
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+        ms = seconds * 1000
+        self.buckets[next((i for i, edge in enumerate(HISTOGRAM_BUCKETS_MS) if ms <= edge), -1)] += 1
+        for key in ("input_tokens", "output_tokens"):
+            self.tokens[key] += span.attrs.get(key, 0)
+
+    def percentile(self, pct):
+        ordered = sorted(self.samples)
+        return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))] if ordered else 0.0
+
+    def as_dict(self):
+        labels = [f"<={edge}ms" for edge in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+            **({"tokens": dict(self.tokens)} if any(self.tokens.values()) else {}),
+        }
+
+class Tracer:
+    """
+    In-process tracing, no external service.
+    - `with TRACER.span("name", key=value):` times a block; spans opened inside it become its children,
+      so one request ("request" span) ends up as a tree: agent turns, tool calls, Chroma searches...
+    - `instrument(obj, "method", "name")` wraps one method of one object in a span.
+    - `callbacks()` is a LangChain handler turning LLM calls (with token counts), tool calls
+      and retriever calls into spans. Pass it as config={"callbacks": TRACER.callbacks()}.
+    Every finished span feeds a per-name histogram; `export()` writes all kept spans as a
+    Chrome trace file (open it in chrome://tracing or ui.perfetto.dev).
+    """
+
+    def __init__(self, enabled=TRACE_ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.spans = deque(maxlen=MAX_SPANS)
+        self.traces = OrderedDict() # trace id -> finished spans of that request
+        self.stats = defaultdict(SpanStats)
+        self.handler = TracingCallbackHandler(self)
+        self.origin = time.perf_counter()
+
+    # --- Recording ---
+
+    def start_span(self, name, parent=None, **attrs):
+        return Span(name, parent or _current.get(), attrs)
+
+    def finish(self, span, **attrs):
+        span.end = time.perf_counter()
+        span.attrs.update(attrs)
+        with self.lock:
+            self.spans.append(span)
+            self.stats[span.name].add(span)
+            trace = self.traces.get(span.trace_id)
+            if trace is None:
+                trace = self.traces[span.trace_id] = []
+                while len(self.traces) > MAX_TRACES:
+                    self.traces.popitem(last=False)
+            trace.append(span)
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return self._span(name, attrs)
+
+    @contextmanager
+    def _span(self, name, attrs):
+        span = self.start_span(name, **attrs)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = repr(e)
+            raise
+        finally:
+            _current.reset(token)
+            self.finish(span)
+
+    def instrument(self, obj, method, name):
+        """Wraps obj.method in a span (no-op when tracing is off). Returns obj."""
+        if not self.enabled:
+            return obj
+        original = getattr(obj, method)
+
+        def traced(*args, **kwargs):
+            with self.span(name):
+                return original(*args, **kwargs)
+
+        setattr(obj, method, traced)
+        return obj
+
+    def callbacks(self):
+        return [self.handler] if self.enabled else []
+
+    # --- Reporting ---
+
+    def request_summary(self, request_span):
+        """'⏱️ 12.31s: llm.agent 2x 11.02s (830 tok), chroma.search 1x 0.05s, ...' for one request."""
+        if request_span is None:
+            return ""
+        with self.lock:
+            spans = [s for s in self.traces.get(request_span.trace_id, []) if s is not request_span]
+        grouped = defaultdict(lambda: [0, 0.0, 0])
+        for span in spans:
+            group = grouped[span.name]
+            group[0] += 1
+            group[1] += span.duration
+            group[2] += span.attrs.get("output_tokens", 0)
+        parts = [f"{name} {n}x {seconds:.2f}s" + (f" ({tokens} tok)" if tokens else "")
+                 for name, (n, seconds, tokens) in sorted(grouped.items(), key=lambda item: -item[1][1])]
+        return f"⏱️ {request_span.duration:.2f}s: " + ", ".join(parts)
+
+    def histograms(self):
+        with self.lock:
+            return {name: stats.as_dict() for name, stats in sorted(self.stats.items())}
+
+    def summary(self):
+        lines = ["Trace summary (per span name):"]
+        for name, stats in self.histograms().items():
+            tokens = f", {stats['tokens'].get('output_tokens', 0)} output tokens" if "tokens" in stats else ""
+            lines.append(f"   {name:<34} {stats['count']:5d}x  p50 {stats['p50_ms']:9.1f} ms  "
+                         f"p95 {stats['p95_ms']:9.1f} ms  max {stats['max_ms']:9.1f} ms{tokens}")
+        return "\n".join(lines)
+
+    def export(self, path=TRACE_FILE):
+        """Writes every kept span in Chrome's trace event format, with the histograms alongside."""
+        with self.lock:
+            spans = list(self.spans)
+        events = [{
+            "name": span.name, "ph": "X", "pid": 1, "tid": span.thread,
+            "ts": round((span.start - self.origin) * 1e6), "dur": round(span.duration * 1e6),
+            "args": {"trace_id": span.trace_id, "span_id": span.span_id, "parent_id": span.parent_id,
+                     **{k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in span.attrs.items()}},
+        } for span in spans]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "histograms": self.histograms()}, f)
+        os.replace(tmp_path, path)
+        return len(events)
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain callbacks -> spans. LLM calls made by a model tagged 'agent' become 'llm.agent', others 'llm.self_query'."""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.open = {} # run id -> (span, context token, span that was current before it)
+
+    def _start(self, run_id, parent_run_id, name, **attrs):
+        parent = self.open.get(parent_run_id, (None,))[0]
+        span = self.tracer.start_span(name, parent, **attrs)
+        # Made current so e.g. the Chroma search inside a tool call nests under the tool's span
+        previous = _current.get()
+        self.open[run_id] = (span, _current.set(span), previous)
+
+    def _end(self, run_id, **attrs):
+        entry = self.open.pop(run_id, None)
+        if entry is None:
+            return
+        span, token, previous = entry
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Ended in another context than it started in (async callbacks, executor threads)
+            _current.set(previous)
+        if span is not None:
+            self.tracer.finish(span, **attrs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        self._start(run_id, parent_run_id, "llm.agent" if "agent" in (tags or []) else "llm.self_query")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        tokens = defaultdict(int)
+        for generation in response.generations[0] if response.generations else []:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            for key in ("input_tokens", "output_tokens"):
+                tokens[key] += usage.get(key, 0)
+        self._end(run_id, **tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=repr(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, parent_run_id, f"tool.{name}", input=input_str[:200])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=repr(error))
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, f"retriever.{kwargs.get('name') or 'retriever'}", query=query[:200])
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=repr(error))
+
+TRACER = Tracer()
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# chat.py reads these at import: fake models and the fake-embedding DB (`create_db.py --fake-embeddings --db benchmark/fake_db`)
+os.environ.setdefault("POKEDEX_FAKE_MODELS", "1")
+os.environ.setdefault("POKEDEX_DB", os.path.join(ROOT, "benchmark", "fake_db"))
+
+
+@pytest.fixture(scope="session")
+def chat():
+    """chat.py fully loaded, run from the repo root like the scripts are."""
+    if not os.path.exists(os.path.join(os.environ["POKEDEX_DB"], "chroma.sqlite3")):
+        pytest.skip("no fake vector DB, build it with helper/create_db.py --fake-embeddings --db benchmark/fake_db")
+    os.chdir(ROOT)
+    import chat as chat_module
+    chat_module.wait_until_ready()
+    chat_module.retriever.verbose = False
+    return chat_module
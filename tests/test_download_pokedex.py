@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "helper"))
+from download_pokedex import Fetcher, TokenBucket, process_pokemon  # noqa: E402
+
+
+def pokemon_payload(base, pid):
+    return {
+        "id": pid,
+        "species": {"url": f"{base}/pokemon-species/{pid}/"},
+        "types": [{"type": {"name": "grass"}}],
+        "abilities": [{"ability": {"name": "overgrow"}}],
+        "stats": [{"stat": {"name": "hp"}, "base_stat": 45}],
+        "moves": [{"move": {"name": "tackle"}}],
+    }
+
+
+def species_payload(base, pid):
+    return {
+        "flavor_text_entries": [{"language": {"name": "en"}, "flavor_text": "A seed."}],
+        "varieties": [{"pokemon": {"name": "x"}}],
+        "color": {"name": "green"},
+        "shape": {"name": "quadruped"},
+        "evolution_chain": {"url": f"{base}/evolution-chain/1/"},
+    }
+
+
+CHAIN = {"chain": {
+    "species": {"name": "bulbasaur"},
+    "evolves_to": [{
+        "species": {"name": "ivysaur"},
+        "evolution_details": [{"trigger": {"name": "level-up"}, "min_level": 16}],
+        "evolves_to": [],
+    }],
+}}
+
+
+@pytest.fixture
+def pokeapi():
+    """A local stand-in for PokeAPI serving a two-Pokemon evolution chain, counting hits per path."""
+    hits = Counter()
+    broken = set()  # Paths answered with a 500
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] += 1
+            if self.path in broken:
+                self.send_error(500)
+                return
+            base = f"http://127.0.0.1:{self.server.server_port}"
+            kind, pid = self.path.strip("/").split("/")
+            if kind == "pokemon":
+                body = pokemon_payload(base, int(pid))
+            elif kind == "pokemon-species":
+                body = species_payload(base, int(pid))
+            else:
+                time.sleep(0.1)  # Slow enough that both workers ask for the chain at once
+                body = CHAIN
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", hits, broken
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_bucket_below_one_request_per_second():
+    bucket = TokenBucket(0.5)
+    assert bucket.capacity == 1.0
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(20)
+    start = time.monotonic()
+    for _ in range(30):  # 20 from the full bucket, 10 more at 20/s
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.45
+
+
+def test_evolution_chain_fetched_once(pokeapi):
+    base, hits, _ = pokeapi
+    fetcher = Fetcher(workers=2, rate=100)
+    pokemon = [{"name": "bulbasaur", "url": f"{base}/pokemon/1/"}, {"name": "ivysaur", "url": f"{base}/pokemon/2/"}]
+    threads = []
+    entries = [None, None]
+    for i, p in enumerate(pokemon):
+        threads.append(threading.Thread(target=lambda i=i, p=p: entries.__setitem__(i, process_pokemon(p, fetcher))))
+        threads[-1].start()
+    for thread in threads:
+        thread.join()
+    fetcher.close()
+
+    assert hits["/evolution-chain/1/"] == 1
+    assert fetcher.memo_hits == 1
+    for entry in entries:
+        assert entry["evolution_info"] == "Bulbasaur evolves into Ivysaur via leveling up starting at level 16."
+        assert entry["evolution_edges"][0]["conditions"] == {"min_level": 16}
+
+
+def test_failed_chain_is_not_checkpointed(pokeapi):
+    base, hits, broken = pokeapi
+    broken.add("/evolution-chain/1/")
+    fetcher = Fetcher(workers=1, rate=100)
+    assert process_pokemon({"name": "bulbasaur", "url": f"{base}/pokemon/1/"}, fetcher) is None
+    fetcher.close()
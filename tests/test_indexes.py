@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+from filter_index import FilterIndex
+from move_index import MoveIndex
+from name_index import NameResolver
+from stat_index import StatIndex, parse_conditions
+from structured_query import StructuredQueryParser
+
+POKEDEX_FILE = os.path.join(os.path.dirname(__file__), "..", "pokedex", "pokedex.json")
+
+
+def entry(name, pid, types, speed=50, moves=(), abilities=("overgrow",)):
+    return {
+        "name": name, "id": pid, "types": list(types), "abilities": list(abilities), "moves": list(moves),
+        "color": "red", "shape": "upright", "variants": [],
+        "stats": {"hp": 50, "attack": 50, "defense": 50, "special-attack": 50, "special-defense": 50, "speed": speed},
+    }
+
+
+SMALL_DEX = [
+    entry("Alpha", 1, ["fire"], speed=120, moves=["earthquake", "ice-beam"]),
+    entry("Beta", 2, ["water", "flying"], speed=80, moves=["earthquake", "surf"]),
+    entry("Gamma", 3, ["fire", "flying"], speed=101, moves=["ice beam", "surf"]),
+    entry("Delta", 4, ["grass"], speed=30, moves=["earthquake", "ice beam", "surf"]),
+]
+
+
+@pytest.fixture(scope="module")
+def pokedex():
+    with open(POKEDEX_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_move_index_learner_bits():
+    index = MoveIndex(SMALL_DEX)
+    move = index.move_id
+
+    def names(bits):
+        return [index.names[row] for row in index.rows_of(bits)]
+
+    assert names(index.learner_bits(all_of=[move("earthquake"), move("Ice Beam")])) == ["Alpha", "Delta"]
+    assert names(index.learner_bits(any_of=[move("ice-beam"), move("surf")])) == ["Alpha", "Beta", "Gamma", "Delta"]
+    assert names(index.learner_bits(all_of=[move("earthquake")], none_of=[move("surf")])) == ["Alpha"]
+    assert names(index.learner_bits(any_of=[move("surf")], none_of=[move("earthquake")])) == ["Gamma"]
+    assert move("splash") is None
+
+
+def test_stat_index_query():
+    index = StatIndex(SMALL_DEX)
+    total, rows = index.query(parse_conditions("type=fire, speed>100"), sort_by="speed")
+    assert total == 2
+    assert [index.names[row] for row in rows] == ["Alpha", "Gamma"]
+    total, rows = index.query(parse_conditions("type=flying"), sort_by="spe", descending=False, limit=1)
+    assert total == 2 and [index.names[row] for row in rows] == ["Beta"]
+    with pytest.raises(ValueError):
+        index.query(parse_conditions("type=plasma"))
+
+
+def test_name_resolver_typos(pokedex):
+    resolver = NameResolver(pokedex, [])
+    charizard = resolver.resolve_pokemon("charizzard")
+    assert charizard.value == "Charizard" and not charizard.exact
+    assert resolver.resolve_pokemon("Mr Mime").value == "Mr-mime"
+    assert resolver.resolve_pokemon("mr. mime").exact
+    assert resolver.resolve_pokemon("qqqqqqqq") is None
+
+
+def test_structured_query_parser(pokedex):
+    parser = StructuredQueryParser(pokedex, multi_valued=True)
+    parsed = parser.parse("fire types with speed > 100")
+    assert parsed.where == {"$and": [{"speed": {"$gt": 100}}, {"types": {"$contains": "fire"}}]}
+    # A named Pokemon next to other conditions is left to the LLM query constructor
+    assert parser.parse("Is Charizard a water type?") is None
+    assert parser.parse("which is faster, pikachu or raichu?") is None
+
+
+@pytest.mark.parametrize("where", [
+    {"types": {"$contains": "fire"}},
+    {"$and": [{"types": {"$contains": "water"}}, {"speed": {"$gt": 100}}]},
+    {"$and": [{"generation": {"$eq": 4}}, {"total": {"$gte": 500}}]},
+    {"$or": [{"color": {"$eq": "pink"}}, {"abilities": {"$contains": "levitate"}}]},
+    {"$and": [{"type": {"$eq": "dragon"}}, {"secondary_type": {"$ne": "none"}}]},
+])
+def test_filter_index_matches_chroma(chat, where):
+    from langchain_chroma import Chroma
+    query = "a strong and fast Pokemon"
+    vector = chat.db.embeddings.embed_query(query)
+    # Every match (Chroma's filtered HNSW search can come back short with a large k, so compare with get())
+    everything = chat.FILTER_INDEX.search(vector, where, k=len(chat.FILTER_INDEX))
+    assert everything
+    assert {doc.id for doc in everything} == set(chat.db.get(where=where)["ids"])
+    # And the same top k, in the same order; the class method skips the filter index installed on db
+    chroma = Chroma.similarity_search(chat.db, query, k=4, filter=where)
+    assert [doc.id for doc in chat.FILTER_INDEX.search(vector, where, k=4)] == [doc.id for doc in chroma]
+
+
+def test_filter_index_empty_collection():
+    index = FilterIndex([], [], [], None)
+    assert len(index) == 0 and not index.has_field("types")
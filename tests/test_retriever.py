@@ -0,0 +1,19 @@
+from langchain_core.runnables import RunnableLambda
+from langchain_core.structured_query import Comparator, Comparison, Operation, Operator, StructuredQuery
+
+
+def test_fallback_filter_applies_to_keyword_hits(chat, monkeypatch):
+    # What the SelfQuery LLM builds for "fire & speed > 100"
+    structured = StructuredQuery(query="fire speed", limit=None, filter=Operation(operator=Operator.AND, arguments=[
+        Comparison(comparator=Comparator.CONTAIN, attribute="types", value="fire"),
+        Comparison(comparator=Comparator.GT, attribute="speed", value=100),
+    ]))
+    monkeypatch.setattr(chat.self_query_retriever, "query_constructor", RunnableLambda(lambda _: structured))
+    question = "fire & speed > 100"
+    assert chat.retriever.parser.parse(question) is None  # Goes down the fallback path
+
+    docs = chat.retriever.invoke(question)
+    assert len(docs) == chat.retriever.k
+    for doc in docs:
+        assert "fire" in doc.metadata["types"]
+        assert doc.metadata["speed"] > 100
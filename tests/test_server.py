@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from server import ProfessorServer
+
+
+@pytest.fixture
+def agent_executor(chat):
+    llm = chat.make_chat_model()
+    llm.tags = ["agent"]
+    return chat.build_agent_executor(llm, verbose=False)
+
+
+async def request(port, method, path, body=b""):
+    """One raw HTTP request. Returns (status, body), the chunked SSE body decoded into its events."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    if b"text/event-stream" not in head:
+        return status, json.loads(payload)
+    events = []
+    while payload:
+        size, _, rest = payload.partition(b"\r\n")
+        size = int(size, 16)
+        if size == 0:
+            break
+        chunk, payload = rest[:size], rest[size + 2:]
+        events.append(json.loads(chunk.decode()[len("data: "):]))
+    return status, events
+
+
+def chat_body(message, session_id=None):
+    return json.dumps({"message": message, "session_id": session_id}).encode()
+
+
+async def serving(server, test):
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    async with listener:
+        return await test(listener.sockets[0].getsockname()[1])
+
+
+def test_chat_streams_events(agent_executor):
+    server = ProfessorServer(agent_executor)
+
+    async def test(port):
+        return await request(port, "POST", "/chat", chat_body("Who is Pikachu?", "s1"))
+
+    status, events = asyncio.run(serving(server, test))
+    assert status == 200
+    assert events[0] == {"type": "session", "session_id": "s1"}
+    kinds = [event["type"] for event in events]
+    assert "tool" in kinds and "token" in kinds
+    assert kinds[-1] == "done"
+    assert events[-1]["output"] == "".join(event["content"] for event in events if event["type"] == "token")
+
+
+def test_sessions_keep_their_own_history(agent_executor):
+    server = ProfessorServer(agent_executor)
+
+    async def test(port):
+        await request(port, "POST", "/chat", chat_body("Who is Pikachu?", "a"))
+        await request(port, "POST", "/chat", chat_body("Who is Gengar?", "b"))
+        await request(port, "POST", "/chat", chat_body("And its evolution?", "a"))
+
+    asyncio.run(serving(server, test))
+    assert [question for question, _ in server.sessions["a"].history] == ["Who is Pikachu?", "And its evolution?"]
+    assert [question for question, _ in server.sessions["b"].history] == ["Who is Gengar?"]
+
+
+def test_busy_server_answers_503(agent_executor):
+    server = ProfessorServer(agent_executor, max_concurrent_runs=1, max_waiting=1)
+
+    async def test(port):
+        async with server.run_slots:  # The only run slot is taken
+            queued = asyncio.create_task(request(port, "POST", "/chat", chat_body("Who is Pikachu?")))
+            while server.waiting < 1:
+                await asyncio.sleep(0.01)
+            rejected = await request(port, "POST", "/chat", chat_body("Who is Gengar?"))
+        return rejected, await queued
+
+    (status, body), (queued_status, events) = asyncio.run(serving(server, test))
+    assert status == 503 and "busy" in body["error"]
+    assert queued_status == 200 and events[-1]["type"] == "done"
+
+
+def test_malformed_json_is_400(agent_executor):
+    server = ProfessorServer(agent_executor)
+
+    async def test(port):
+        return await request(port, "POST", "/chat", b"{not json")
+
+    status, body = asyncio.run(serving(server, test))
+    assert status == 400
+    assert body == {"error": "Malformed request"}
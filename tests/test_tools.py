@@ -0,0 +1,22 @@
+def test_find_move_learners_limit_is_clamped(chat):
+    for limit in (0, -5):
+        answer = chat.find_move_learners_tool.invoke({"all_of": ["earthquake"], "limit": limit})
+        count = int(answer.split()[0])
+        assert answer.endswith(f"(and {count - 1} more).")
+    answer = chat.find_move_learners_tool.invoke({"all_of": ["earthquake"], "limit": 1000})
+    assert len(answer.split(": ", 1)[1].split(", ")) == chat.MAX_LISTED_NAMES
+
+
+def test_find_move_learners_needs_a_move(chat):
+    assert chat.find_move_learners_tool.invoke({"all_of": [], "none_of": ["splash"]}).startswith("Error:")
+
+
+def test_check_move_reports_unknown_moves(chat):
+    assert chat.check_move_tool.invoke({"pokemon_name": "Pikachu", "move_name": "xyzzy"}) == \
+        "Error: No Pokemon learns a move called 'xyzzy'."
+    assert chat.check_move_tool.invoke({"pokemon_name": "Pikachu", "move_name": "thunderbolt"}).startswith("✅ Yes!")
+    lines = chat.check_moves_tool.invoke({"pokemon_names": ["Pikachu", "Onix"], "move_names": ["xyzzy", "thunderbolt"]}).splitlines()
+    assert lines[0] == "Error: No Pokemon learns a move called 'xyzzy'."
+    assert lines[1].startswith("✅ Pikachu can learn")
+    assert lines[2].startswith("❌ Onix cannot learn")
+    assert len(lines) == 3